@@ -17,11 +17,32 @@ __version__ = '0.0.3'
 
 from typing import NamedTuple, Literal
 
+from .animated import AnimatedEditor
+from .bulk import RenderResult, render_many
+from .cache import CacheInfo, DiskCache, LRUCache
 from .canvas import Canvas
-from .editor import Editor
-from .font import Font
-from .text import Text
-from .utils import load_image, run_in_executor
+from .editor import Editor, get_render_cache, set_render_cache
+from .font import Font, get_font_cache, set_font_cache
+from .gradient import Gradient
+from .grid import Grid
+from .template import Template
+from .text import Text, get_text_cache, set_text_cache
+from .utils import (
+    close_session,
+    get_disk_cache,
+    get_executor,
+    get_image_cache,
+    get_session,
+    load_image,
+    load_images,
+    run_in_executor,
+    set_disk_cache,
+    set_executor,
+    set_image_cache,
+    set_image_limits,
+    set_session,
+    shutdown_executor,
+)
 
 
 class VersionInfo(NamedTuple):
@@ -0,0 +1,412 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+from io import BytesIO
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from PIL import Image, ImageChops, ImageSequence
+
+from .canvas import Canvas
+from .editor import Editor, _encode, _Operation
+from .utils import _open_image, _run_in_thread
+
+# Formats that are written with all frames, APNG is written as PNG
+_ANIMATED_FORMATS = ('gif', 'png', 'webp')
+# Duration of frames without one in milliseconds
+_DEFAULT_DURATION = 100
+# A GIF frame gets a new palette once more than 1% of its pixels are off by more than 32 levels in a band
+_PALETTE_ERROR = 32
+_PALETTE_MISFIT = 0.01
+
+
+class AnimatedEditor(Editor):
+    """Editor for animated images like GIF, APNG and WEBP
+
+    All operations are recorded and applied to every frame when the image is encoded.
+    Frames are decoded and edited one after another while the writer takes them, only :meth:`frames`
+    never holds more than one frame. Pillow's writers keep all frames until the file is written,
+    GIF as palette images, APNG and WEBP as RGBA images.
+    Other animated editors passed to an operation, e.g. to :meth:`Editor.paste`, are played along.
+    Used by a non-animated editor or a :class:`Grid`, only the first frame (see :attr:`image`) is used.
+
+    .. code-block:: python
+
+        card = AnimatedEditor(Canvas((900, 300), color='#23272A'))
+        avatar = AnimatedEditor(BytesIO(await response.read()), target_size=(150, 150))
+
+        await avatar.resize((150, 150))
+        await avatar.circle_image()
+        await card.paste(avatar, (30, 30))
+        await card.text((200, 40), 'Guddi#9552', font=Font.poppins(size=40), color='white')
+
+        file = discord.File(fp=await card.render('gif'), filename='card.gif')
+
+    Parameters
+    ----------
+    image: Union[:class:`Image.Image`, :class:`str`, :class:`BytesIO`, :class:`Editor`, :class:`Canvas`]
+        Animated image to edit. Images with a single frame and editors are used as a static background.
+    target_size: Tuple[:class:`int`, :class:`int`], optional
+        Size the frames get resized to afterwards, by default ``None``.
+        Big frames are decoded at a reduced size that is still at least ``target_size``.
+    """
+
+    _cacheable = False
+
+    def __init__(
+        self,
+        image: Union[Image.Image, str, BytesIO, Editor, Canvas],
+        target_size: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        data: Optional[bytes] = None
+
+        if isinstance(image, AnimatedEditor):
+            data, target_size = image._data, image._target_size
+        elif isinstance(image, str):
+            with open(image, 'rb') as f:
+                data = f.read()
+        elif isinstance(image, BytesIO):
+            data = image.getvalue()
+        elif isinstance(image, Image.Image) and getattr(image, 'is_animated', False):
+            data = _save_source(image)
+
+        if data is not None:
+            self._image: Image.Image = _open_image(BytesIO(data), target_size)
+            with Image.open(BytesIO(data)) as source:
+                self._source_frames: int = getattr(source, 'n_frames', 1)
+                # Factor the frames are reduced by to match target_size
+                self._factor: int = source.width // self._image.width
+        else:
+            image = image.image if isinstance(image, (Editor, Canvas)) else image
+            self._image = image.convert('RGBA')
+            self._source_frames = 1
+            self._factor = 1
+
+        self._data = data
+        self._target_size = target_size
+        self._shared_image: Optional[Image.Image] = None
+        # Edited first frame and the state of the operations it was edited with
+        self._first_frame: Optional[Tuple[Tuple, Image.Image]] = None
+        # Operations are never run directly, they are applied to every frame when encoding
+        self._operations: List[_Operation] = list(image._operations) if isinstance(image, AnimatedEditor) else []
+
+    @property
+    def image(self) -> Image.Image:
+        """First frame with all recorded operations applied
+
+        It is edited on first access after operations were added, so avoid it on the event loop.
+        """
+        version = self._version()
+
+        if self._first_frame is None or self._first_frame[0] != version:
+            frames = _frames(self)
+            try:
+                self._first_frame = (version, next(frames))
+            finally:
+                frames.close()
+
+        return self._first_frame[1]
+
+    @property
+    def n_frames(self) -> int:
+        """Amount of frames, including frames of the animated editors used by the operations"""
+        return max([self._source_frames] + [editor.n_frames for editor in self._nested()])
+
+    def _nested(self) -> Iterator[AnimatedEditor]:
+        for operation in self._operations:
+            for value in (*operation.args, *operation.kwargs.values()):
+                if isinstance(value, AnimatedEditor):
+                    yield value
+
+    def _version(self) -> Tuple:
+        # Operations are only ever added, so their amount identifies the state of an editor
+        return len(self._operations), tuple(editor._version() for editor in self._nested())
+
+    def fork(self) -> AnimatedEditor:
+        """Create a new editor with the same source and operations
+
+        Operations added to the new editor don't change this one.
+
+        Returns
+        -------
+        :class:`AnimatedEditor`
+            The new editor
+        """
+        editor = copy.copy(self)
+        editor._operations = list(self._operations)
+        return editor
+
+    async def frames(self) -> AsyncIterator[Image.Image]:
+        """Edit the frames in a thread and yield them one by one
+
+        The duration of each frame in milliseconds is stored in its ``info['duration']``.
+
+        Yields
+        ------
+        :class:`Image.Image`
+            The edited frames
+        """
+        frames = _frames(self)
+
+        try:
+            while True:
+                frame = await _run_in_thread(next, frames, None)
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            await _run_in_thread(frames.close)
+
+    async def show(self):
+        """Show the first frame."""
+        await _run_in_thread(_show, self)
+
+    async def save(self, fp, format: str = None, **params):
+        """Save the image with all frames
+
+        Parameters
+        ----------
+        fp: :class:`str`
+            File path
+        format: :class:`str`, optional
+            File format, by default ``None`` (derived from the file extension)
+        **params
+            Encoder options, see :meth:`Editor.encode`
+        """
+        # The file object belongs to this process, so it is never written by a process pool
+        await _run_in_thread(_save, self, fp, format, params)
+
+    def _take_operations(self) -> List[_Operation]:
+        # The operations are kept, every render edits the frames from the source again
+        return list(self._operations)
+
+    def _write(self, fp, operations: List[_Operation], format: str, params: Dict[str, Any]) -> None:
+        _encode_frames(self, fp, format, **params)
+
+
+class _FrameReader:
+    # Decodes the frames of the animated editors of one render, every source is opened only once
+
+    def __init__(self) -> None:
+        self._sources: Dict[int, Image.Image] = {}
+
+    def read(self, editor: AnimatedEditor, index: int) -> Tuple[Image.Image, Optional[int]]:
+        duration = None
+
+        if editor._data is None:
+            image = editor._image.copy()
+        else:
+            source = self._sources.get(id(editor))
+            if source is None:
+                source = self._sources[id(editor)] = Image.open(BytesIO(editor._data))
+
+            # Shorter animations are repeated
+            source.seek(index % editor._source_frames)
+            duration = source.info.get('duration')
+
+            image = source.convert('RGBA')
+            if editor._factor >= 2:
+                image = image.reduce(editor._factor)
+
+        frame = Editor(image, copy=False)
+        nested_durations: List[Optional[int]] = []
+
+        def resolve(value: Any) -> Any:
+            # Animated editors used by an operation are replaced by their frame of the same index
+            if isinstance(value, AnimatedEditor):
+                value, nested_duration = self.read(value, index)
+                nested_durations.append(nested_duration)
+            return value
+
+        for name, args, kwargs in editor._operations:
+            args = [resolve(value) for value in args]
+            kwargs = {key: resolve(value) for key, value in kwargs.items()}
+            getattr(frame, name)(*args, **kwargs)
+
+        if duration is None:
+            # A static image takes the timing of the animations used on it
+            duration = next((value for value in nested_durations if value is not None), None)
+
+        return frame.image, duration
+
+    def close(self) -> None:
+        for source in self._sources.values():
+            source.close()
+        self._sources.clear()
+
+
+def _frames(editor: AnimatedEditor, start: int = 0) -> Iterator[Image.Image]:
+    reader = _FrameReader()
+
+    try:
+        for index in range(start, editor.n_frames):
+            image, duration = reader.read(editor, index)
+            image.info['duration'] = duration if duration is not None else _DEFAULT_DURATION
+            yield image
+    finally:
+        reader.close()
+
+
+class _GifPalette:
+    # Quantizes the frames to the palette of a previous frame instead of building a new palette per frame.
+    # A new palette is only built once too many pixels don't fit anymore. The last index is left for transparency.
+
+    transparency = 255
+
+    def __init__(self, first: Image.Image) -> None:
+        self.image = Image.new('P', (1, 1))
+        self._build(first.convert('RGB'))
+
+    def _build(self, image: Image.Image) -> None:
+        palette = image.quantize(255).getpalette()[:255 * 3]
+        palette += [0] * (255 * 3 - len(palette))
+        # Equal colors map to the lower index, so the copy of the first color is only used for transparency
+        palette += palette[:3]
+
+        self.image.putpalette(palette)
+
+    def _fits(self, image: Image.Image, quantized: Image.Image) -> bool:
+        # Every band is checked on its own, a luminance difference would hide errors in blue
+        error = ImageChops.difference(image, quantized.convert('RGB')).histogram()
+        misfits = max(sum(error[band * 256 + _PALETTE_ERROR:(band + 1) * 256]) for band in range(3))
+        return misfits <= image.width * image.height * _PALETTE_MISFIT
+
+    def __call__(self, frame: Image.Image) -> Image.Image:
+        rgb = frame.convert('RGB')
+        image = rgb.quantize(palette=self.image, dither=Image.Dither.NONE)
+
+        if not self._fits(rgb, image):
+            self._build(rgb)
+            image = rgb.quantize(palette=self.image, dither=Image.Dither.NONE)
+
+        transparent = frame.getchannel('A').point(lambda alpha: 255 if alpha < 128 else 0)
+        if transparent.getbbox():
+            image.paste(self.transparency, mask=transparent)
+
+        image.info['duration'] = frame.info['duration']
+        return image
+
+
+class _AppendFrames:
+    # Frames after the first one, edited while the writer takes them.
+    # Newer APNG writers iterate them twice, every iteration edits the frames from the source again.
+
+    def __init__(
+        self, editor: AnimatedEditor, convert: Optional[_GifPalette], durations: List[int]
+    ) -> None:
+        self.editor = editor
+        self.convert = convert
+        self.durations = durations
+
+    def __iter__(self) -> Iterator[Image.Image]:
+        # The writers read the duration of a frame after taking it
+        del self.durations[1:]
+
+        frames = _frames(self.editor, start=1)
+        try:
+            for frame in frames:
+                if self.convert is not None:
+                    frame = self.convert(frame)
+                self.durations.append(frame.info['duration'])
+                yield frame
+        finally:
+            frames.close()
+
+
+def _encode_frames(
+    editor: AnimatedEditor,
+    fp,
+    format: str,
+    quality: Optional[int] = None,
+    compress_level: Optional[int] = None,
+    optimize: bool = False,
+    background: Union[Tuple[int, int, int], str, int] = 'white',
+    **params,
+) -> None:
+    format = format.lower()
+    if format == 'apng':
+        format = 'png'
+
+    if format in _ANIMATED_FORMATS:
+        Image.init()
+        if format.upper() not in Image.SAVE_ALL:
+            raise ValueError(f'This Pillow build can\'t write animated {format.upper()} images')
+
+    # The edited first frame is cached by the editor
+    first = editor.image
+
+    if format not in _ANIMATED_FORMATS:
+        _encode(first, fp, format, quality, compress_level, optimize, background, **params)
+        return
+
+    convert = None
+    if format == 'gif':
+        convert = _GifPalette(first)
+        params.setdefault('transparency', convert.transparency)
+        if first.getchannel('A').getextrema()[0] < 128:
+            params.setdefault('disposal', 2)
+
+        first = convert(first)
+
+    if quality is not None:
+        params['quality'] = quality
+    if compress_level is not None:
+        params['compress_level'] = compress_level
+    if optimize:
+        params['optimize'] = optimize
+    params.setdefault('loop', 0)
+
+    durations = [first.info['duration']]
+    append = _AppendFrames(editor, convert, durations)
+    if format == 'webp':
+        # The WEBP writer needs all frames at once
+        append = list(append)
+
+    first.save(fp, format, save_all=True, append_images=append, duration=durations, **params)
+
+
+def _save_source(image: Image.Image) -> bytes:
+    # Keeps an opened animated image as lossless APNG, so the frames can be decoded again for every render
+    frames = ImageSequence.all_frames(image, lambda frame: frame.convert('RGBA'))
+    durations = [frame.info.get('duration', _DEFAULT_DURATION) for frame in frames]
+
+    data = BytesIO()
+    frames[0].save(data, 'png', save_all=True, append_images=frames[1:], duration=durations, loop=0)
+    return data.getvalue()
+
+
+def _save(editor: AnimatedEditor, fp, format: Optional[str], params: Dict[str, Any]) -> None:
+    if format is None:
+        extension = os.path.splitext(fp)[1].lower()
+        format = Image.registered_extensions().get(extension, extension.lstrip('.'))
+
+    editor._write(fp, [], format, params)
+
+
+def _show(editor: AnimatedEditor) -> None:
+    editor.image.show()
@@ -0,0 +1,140 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from io import BytesIO
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, NamedTuple, Optional, Union
+
+from .editor import Editor
+
+Job = Union[Awaitable[Any], Callable[[], Awaitable[Any]]]
+
+
+class RenderResult(NamedTuple):
+    """Result of one job of :func:`render_many`"""
+
+    index: int
+    result: Optional[Union[BytesIO, Any]]
+    error: Optional[BaseException]
+
+
+async def render_many(
+    jobs: Iterable[Job], concurrency: int = 4, format: str = 'png', **params
+) -> AsyncIterator[RenderResult]:
+    """Render many images with bounded concurrency
+
+    Every job creates one whole image, at most ``concurrency`` jobs run at the same time.
+    Jobs are taken from ``jobs`` only when a slot is free and results are yielded in the order the jobs finish.
+    Running jobs wait while ``concurrency`` results are not consumed yet.
+    A failing job doesn't stop the others, its exception is returned in its result,
+    a job that was cancelled on its own returns its :class:`asyncio.CancelledError`.
+
+    Draw each image inside :meth:`Editor.batch` or use a :class:`Template`,
+    so every image runs in a single executor call instead of one call per operation.
+
+    .. code-block:: python
+
+        async def card(member):
+            editor = await template.fill(name=member.name, level=member.level)
+            return editor
+
+        async for result in render_many(card(member) for member in members):
+            if result.error is None:
+                files[result.index] = discord.File(fp=result.result, filename='card.png')
+
+    Parameters
+    ----------
+    jobs: Iterable[Union[Awaitable, Callable[[], Awaitable]]]
+        Coroutines or coroutine functions creating the images.
+        An :class:`Editor` returned by a job is rendered with :meth:`Editor.render`, other results are returned as is.
+    concurrency: :class:`int`, optional
+        Maximum amount of jobs running at the same time, by default ``4``
+    format: :class:`str`, optional
+        Image format for returned editors, by default ``'png'``
+    **params
+        Encoder options for returned editors, see :meth:`Editor.encode`
+
+    Yields
+    ------
+    :class:`RenderResult`
+        Named tuple of the ``index`` of the job, its ``result`` and the ``error`` it raised.
+        ``result`` is ``None`` if the job failed, ``error`` is ``None`` if it succeeded.
+    """
+    if concurrency < 1:
+        raise ValueError('concurrency must be at least 1')
+
+    # Workers share the iterator, so jobs are only created when a worker is free
+    iterator = iter(enumerate(jobs))
+    # Bounded, so workers wait for the consumer. None marks a finished worker.
+    results: asyncio.Queue = asyncio.Queue(concurrency)
+    errors: List[Exception] = []
+
+    # Set before the workers are cancelled, a CancelledError raised before comes from a job
+    stopped = False
+
+    async def work() -> None:
+        try:
+            for index, job in iterator:
+                try:
+                    result = await (job() if callable(job) else job)
+                    if isinstance(result, Editor):
+                        result = await result.render(format, **params)
+                except asyncio.CancelledError as error:
+                    if stopped:
+                        raise
+                    await results.put(RenderResult(index, None, error))
+                except Exception as error:
+                    await results.put(RenderResult(index, None, error))
+                else:
+                    await results.put(RenderResult(index, result, None))
+        except Exception as error:
+            # The jobs iterable itself failed, raised after the running jobs are yielded
+            errors.append(error)
+        finally:
+            # The consumer waits for every worker, even one that died
+            if not stopped:
+                await results.put(None)
+
+    workers = [asyncio.ensure_future(work()) for _ in range(concurrency)]
+
+    try:
+        running = len(workers)
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+            else:
+                yield result
+    finally:
+        # Cancels the running jobs if the iteration stopped early
+        stopped = True
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,396 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+
+# Suffix of the metadata files of DiskCache
+_METADATA = '.json'
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    currsize: int
+    maxsize: int
+
+
+class LRUCache:
+    """Thread safe least recently used cache with an optional time to live
+
+    Parameters
+    ----------
+    maxsize: :class:`int`, optional
+        Maximum size of the cache, by default ``128``
+    ttl: :class:`float`, optional
+        Seconds until an entry expires, by default ``None`` (never)
+    getsizeof: Callable[[Any], :class:`int`], optional
+        Function returning the size of a value, by default ``None``.
+        If not set every entry has a size of ``1``, so ``maxsize`` is the maximum amount of entries.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        getsizeof: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.getsizeof = getsizeof
+
+        self.hits = 0
+        self.misses = 0
+        self.currsize = 0
+
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: Tuple[Any, int, Optional[float]]) -> bool:
+        return entry[2] is not None and entry[2] <= time.monotonic()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value from the cache
+
+        Expired entries count as a miss, but are kept until they are evicted, see :meth:`peek`.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the value
+        default: Any, optional
+            Returned if there is no valid entry, by default ``None``
+        """
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None or self._expired(entry):
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value even if it is expired, without touching the statistics or the order
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the value
+        default: Any, optional
+            Returned if there is no entry, by default ``None``
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[0]
+
+    def set(self, key: Hashable, value: Any, expires_in: Optional[float] = None) -> None:
+        """Add a value to the cache, evicting the least recently used entries if it is full
+
+        Values bigger than ``maxsize`` are not cached.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the value
+        value: Any
+            Value to cache
+        expires_in: :class:`float`, optional
+            Seconds until the value expires, by default ``None`` (the ``ttl`` of the cache)
+        """
+        size = self.getsizeof(value) if self.getsizeof is not None else 1
+        ttl = expires_in if expires_in is not None else self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._remove(key)
+
+            if size > self.maxsize:
+                return
+
+            self._data[key] = (value, size, expires)
+            self.currsize += size
+
+            while self.currsize > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value from the cache
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the value
+        default: Any, optional
+            Returned if there is no entry, by default ``None``
+        """
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry[0]
+
+    def _remove(self, key: Hashable) -> Optional[Tuple[Any, int, Optional[float]]]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.currsize -= entry[1]
+        return entry
+
+    def clear(self) -> None:
+        """Remove all values and reset the statistics"""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.currsize = 0
+
+    def info(self) -> CacheInfo:
+        """Statistics of the cache
+
+        Returns
+        -------
+        :class:`CacheInfo`
+            Named tuple of ``hits``, ``misses``, ``currsize`` and ``maxsize``
+        """
+        return CacheInfo(self.hits, self.misses, self.currsize, self.maxsize)
+
+
+class DiskCache:
+    """Content addressed cache of downloaded files in a directory
+
+    Files are stored by the hash of their key and read memory mapped, their optional metadata is stored next to them
+    as JSON. The least recently used files are deleted once the directory is bigger than ``max_size``.
+
+    Parameters
+    ----------
+    directory: :class:`str`
+        Directory of the cache, created if it doesn't exist
+    max_size: :class:`int`, optional
+        Maximum size of all files in bytes, by default ``512 MiB``
+    """
+
+    def __init__(self, directory: str, max_size: int = 512 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        """Path of the file for ``key``
+
+        Parameters
+        ----------
+        key: :class:`str`
+            Key of the file, e.g. the url
+        """
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def open(self, key: str) -> Optional[mmap.mmap]:
+        """Open the cached file memory mapped
+
+        The caller has to close the returned map.
+
+        Parameters
+        ----------
+        key: :class:`str`
+            Key of the file, e.g. the url
+
+        Returns
+        -------
+        Optional[:class:`mmap.mmap`]
+            Read only map of the file, ``None`` if it is not cached
+        """
+        path = self.path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # The modification time is used to find the least recently used files
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # mmap raises ValueError for empty files
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata stored with a file
+
+        Parameters
+        ----------
+        key: :class:`str`
+            Key of the file, e.g. the url
+
+        Returns
+        -------
+        Optional[Dict[:class:`str`, Any]]
+            The metadata, ``None`` if the file has none
+        """
+        try:
+            with open(self.path(key) + _METADATA, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set_metadata(self, key: str, metadata: Dict[str, Any]) -> None:
+        """Replace the metadata of a cached file, nothing is stored if the file is not cached
+
+        Parameters
+        ----------
+        key: :class:`str`
+            Key of the file, e.g. the url
+        metadata: Dict[:class:`str`, Any]
+            JSON serializable metadata
+        """
+        path = self.path(key)
+        if os.path.exists(path):
+            self._write(path + _METADATA, json.dumps(metadata).encode())
+
+    def set(self, key: str, data: bytes, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Store data in the cache, deleting the least recently used files if it is full
+
+        Parameters
+        ----------
+        key: :class:`str`
+            Key of the file, e.g. the url
+        data: :class:`bytes`
+            Content of the file
+        metadata: Dict[:class:`str`, Any], optional
+            JSON serializable metadata stored with the file, by default ``None``
+        """
+        path = self.path(key)
+
+        # Metadata of the previous content must never be read with the new content
+        self._remove(path + _METADATA)
+
+        # Write to a temporary file first, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+
+            try:
+                old_size = os.path.getsize(path)
+            except FileNotFoundError:
+                old_size = 0
+
+            try:
+                os.replace(temp_path, path)
+            except PermissionError:
+                # Windows doesn't allow replacing a file that is mapped by a reader
+                os.remove(temp_path)
+                return
+            self._size += len(data) - old_size
+
+            if metadata is not None:
+                self._write(path + _METADATA, json.dumps(metadata).encode())
+
+            if self._size > self.max_size:
+                self._cleanup()
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        try:
+            os.replace(temp_path, path)
+        except PermissionError:
+            os.remove(temp_path)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _files(self):
+        # Metadata files are tiny, they are not part of the size and are deleted with their file
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.endswith(('.tmp', _METADATA)):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _cleanup(self) -> None:
+        for path, size, _ in sorted(self._files(), key=lambda file: file[2]):
+            if self._size <= self.max_size:
+                break
+
+            self._remove(path + _METADATA)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+
+    def clear(self) -> None:
+        """Delete all cached files and reset the statistics"""
+        with self._lock:
+            for path, _, _ in list(self._files()):
+                self._remove(path + _METADATA)
+                self._remove(path)
+
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        """Statistics of the cache
+
+        Returns
+        -------
+        :class:`CacheInfo`
+            Named tuple of ``hits``, ``misses``, ``currsize`` and ``maxsize`` in bytes
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._files())
+
+            return CacheInfo(self.hits, self.misses, self._size, self.max_size)
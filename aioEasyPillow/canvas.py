@@ -27,6 +27,8 @@ from typing import Tuple, Union
 
 from PIL import Image
 
+from .gradient import Gradient
+
 
 class Canvas:
     """Canvas class
@@ -39,7 +41,7 @@ class Canvas:
         Width of image, by default ``None``
     height: :class:`float`, optional
         Height of image, by default None
-    color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
+    color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`, :class:`Gradient`], optional
         Color of image, by default ``None``
 
     Raises
@@ -53,7 +55,7 @@ class Canvas:
         size: Tuple[float, float] = None,
         width: float = None,
         height: float = None,
-        color: Union[Tuple[int, int, int], str, int] = None,
+        color: Union[Tuple[int, int, int], str, int, Gradient] = None,
     ) -> None:
         if not size and not width and not height:
             raise ValueError('size, width, and height cannot all be None')
@@ -64,4 +66,7 @@ class Canvas:
         self.size = size
         self.color = color
 
-        self.image: Image.Image = Image.new('RGBA', size, color=color)
+        if isinstance(color, Gradient):
+            self.image: Image.Image = color.image(size).copy()
+        else:
+            self.image: Image.Image = Image.new('RGBA', size, color=color)
@@ -25,16 +25,71 @@ SOFTWARE.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import math
+import weakref
+from contextlib import asynccontextmanager
 from io import BytesIO
-from typing import List, Tuple, Union
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
 
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont
 from typing_extensions import Literal
 
+from .cache import LRUCache
 from .canvas import Canvas
 from .font import Font
-from .text import Text
-from .utils import run_in_executor
+from .gradient import Gradient
+from .text import Text, _draw_text, _font_key, _text_length
+from .utils import _open_image, _run_in_thread, run_in_executor
+
+
+# Masks of circle_image and rounded_corners, avatars are mostly the same size
+_mask_cache = LRUCache(maxsize=16 * 1024 * 1024, getsizeof=lambda mask: mask.width * mask.height)
+
+# Operations writing to objects of this process, they never run in a process pool and are never cached
+_SIDE_EFFECTS = ('_Editor__save', '_Editor__show')
+
+_render_cache: Optional[LRUCache] = None
+# Digests of images shared by Editor.fork, they don't change anymore
+_image_digests: Dict[int, Tuple[weakref.ref, bytes]] = {}
+
+
+def set_render_cache(maxsize: Optional[int] = 32 * 1024 * 1024, ttl: Optional[float] = 60.0) -> Optional[LRUCache]:
+    """Cache the images encoded by :meth:`Editor.render` and :meth:`Template.render`
+
+    The cache is keyed by the image, all recorded operations with their arguments and the encoder options,
+    so rendering the same image again only returns the cached bytes.
+    Operations with side effects like :meth:`Editor.save` are never cached.
+    The images are hashed in a thread for every render, images of :meth:`Editor.fork` only once.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`, optional
+        Maximum size of the encoded images in bytes, by default ``32 MiB``. Set this to ``None`` to disable the cache.
+    ttl: :class:`float`, optional
+        Seconds until a cached image expires, by default ``60.0``. ``None`` never expires.
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The new cache
+    """
+    global _render_cache
+
+    _render_cache = LRUCache(maxsize=maxsize, ttl=ttl, getsizeof=len) if maxsize is not None else None
+    return _render_cache
+
+
+def get_render_cache() -> Optional[LRUCache]:
+    """Get the render cache
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The cache set with :func:`set_render_cache`, ``None`` if it is disabled
+    """
+    return _render_cache
 
 
 class Editor:
@@ -44,16 +99,41 @@ class Editor:
     ----------
     image: Union[:class:`Image.Image`, :class:`str`, :class:`Editor`, :class:`Canvas`]
         Image or Canvas to edit.
+    target_size: Tuple[:class:`int`, :class:`int`], optional
+        Size the image gets resized to afterwards, by default ``None``.
+        Big image files are decoded at a reduced size that is still at least ``target_size``.
+    copy: :class:`bool`, optional
+        Copy the given image, by default ``True``. If ``False`` and the image is already RGBA,
+        the editor edits the given image directly. Use :meth:`fork` to share an image safely.
     """
 
-    def __init__(self, image: Union[Image.Image, str, BytesIO, Editor, Canvas]) -> None:
+    # Whether the render cache can key the editor by its image
+    _cacheable = True
+
+    def __init__(
+        self,
+        image: Union[Image.Image, str, BytesIO, Editor, Canvas],
+        target_size: Optional[Tuple[int, int]] = None,
+        copy: bool = True,
+    ) -> None:
         if isinstance(image, str) or isinstance(image, BytesIO):
-            self.image: Image.Image = Image.open(image)
-        elif isinstance(image, Canvas) or isinstance(image, Editor):
-            self.image: Image.Image = image.image
+            self.image: Image.Image = _open_image(image, target_size)
         else:
-            self.image: Image.Image = image
-        self.image: Image.Image = self.image.convert("RGBA")
+            if isinstance(image, Canvas) or isinstance(image, Editor):
+                image = image.image
+            if image.mode == "RGBA" and not copy:
+                self.image: Image.Image = image
+            else:
+                self.image: Image.Image = image.convert("RGBA")
+        self._operations: Optional[List[_Operation]] = None
+        # Image shared with other editors by fork, it is copied before it gets changed in place
+        self._shared_image: Optional[Image.Image] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # A pickled editor (e.g. in a process pool) owns its image
+        state = self.__dict__.copy()
+        state['_shared_image'] = None
+        return state
 
 
     @property
@@ -65,11 +145,273 @@ class Editor:
         :class:`BytesIO`
             Bytes from the image of Editor
         """
-        _bytes = BytesIO()
-        self.image.save(_bytes, "png")
-        _bytes.seek(0)
+        return self.encode()
+
+    def encode(
+        self,
+        format: str = 'png',
+        *,
+        quality: Optional[int] = None,
+        compress_level: Optional[int] = None,
+        optimize: bool = False,
+        background: Union[Tuple[int, int, int], str, int] = 'white',
+        buffer: Optional[BytesIO] = None,
+        **params,
+    ) -> BytesIO:
+        """Encode the image
+
+        Encoding is blocking, use :meth:`render` to encode in the executor.
+
+        Parameters
+        ----------
+        format: :class:`str`, optional
+            Image format like ``'png'``, ``'webp'`` or ``'jpeg'``, by default ``'png'``
+        quality: :class:`int`, optional
+            Quality for lossy formats from ``0`` to ``100``, by default ``None`` (encoder default)
+        compress_level: :class:`int`, optional
+            PNG zlib level from ``0`` to ``9``, by default ``None`` (``6``).
+            ``1`` encodes a lot faster for slightly bigger images.
+        optimize: :class:`bool`, optional
+            Let the encoder spend more time on smaller images, by default ``False``
+        background: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
+            Color transparent parts are flattened on for formats without alpha like JPEG, by default ``'white'``
+        buffer: :class:`BytesIO`, optional
+            Buffer to reuse, it gets overwritten, by default ``None``
+        **params
+            Extra parameters passed to the image writer
+
+        Returns
+        -------
+        :class:`BytesIO`
+            Bytes of the image, positioned at the start
+        """
+        if buffer is None:
+            buffer = BytesIO()
+        else:
+            buffer.seek(0)
+            buffer.truncate()
+
+        params.update(quality=quality, compress_level=compress_level, optimize=optimize, background=background)
+        self._write(buffer, [], format, params)
+        buffer.seek(0)
+
+        return buffer
+
+
+    def fork(self) -> Editor:
+        """Create a new editor with the same image without copying it
+
+        The image is shared until one of the editors changes it, this editor copies it then (copy-on-write).
+        This is useful to render many variants from one prepared background.
+        Operations recorded by :meth:`batch` that did not run yet are not part of the fork.
+
+        Returns
+        -------
+        :class:`Editor`
+            The new editor
+        """
+        editor = Editor(self.image, copy=False)
+        editor._shared_image = self._shared_image = self.image
+        return editor
+
+    def __writable(self) -> Image.Image:
+        if self.image is self._shared_image:
+            self.image = self.image.copy()
+        self._shared_image = None
+
+        return self.image
+
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[Editor]:
+        """Record all operations and run them in a single executor call
 
-        return _bytes
+        Every operation awaited inside the ``async with`` block returns immediately,
+        the recorded chain runs in one executor call when the block exits.
+        If the block raises, the recorded operations are discarded.
+
+        .. code-block:: python
+
+            async with editor.batch():
+                await editor.resize((150, 150))
+                await editor.circle_image()
+
+        Nested batches are merged into the outermost one.
+        """
+        if self._operations is not None:
+            yield self
+            return
+
+        self._operations = []
+        try:
+            yield self
+        except BaseException:
+            self._operations = None
+            raise
+
+        operations, self._operations = self._operations, None
+        if operations:
+            await self._execute(operations)
+
+    async def render(self, format: str = 'png', **params) -> BytesIO:
+        """Run the recorded operations and encode the image in a single executor call
+
+        Called inside of :meth:`batch` it consumes the operations recorded so far.
+        They are applied to a copy-on-write copy of the image, so the image of this editor never changes,
+        no matter if the image is rendered in a thread, a process pool or returned from the cache set with
+        :func:`set_render_cache`. Await the operations outside of :meth:`batch` to change the image itself.
+
+        Parameters
+        ----------
+        format: :class:`str`, optional
+            Image format, by default ``'png'``
+        **params
+            Encoder options, see :meth:`encode`
+
+        Returns
+        -------
+        :class:`BytesIO`
+            Bytes of the rendered image
+        """
+        operations = self._take_operations()
+
+        cache = _render_cache
+        key = None
+        if cache is not None:
+            # Hashing the image takes milliseconds for large images, so it must not block the event loop
+            key = await _run_in_thread(_render_key, self, operations, format, params)
+
+        if key is not None:
+            data = cache.get(key)
+            if data is not None:
+                return BytesIO(data)
+
+        if _has_side_effects(operations):
+            data = await _run_in_thread(_render, self, operations, format, params)
+        else:
+            data = await run_in_executor(_render, self, operations, format, params)
+
+        if key is not None:
+            cache.set(key, data)
+
+        return BytesIO(data)
+
+    async def to_bytes(self, format: str = 'png', **params) -> bytes:
+        """Encode the image in the executor
+
+        Same as :meth:`render`, but returns the bytes directly.
+
+        Parameters
+        ----------
+        format: :class:`str`, optional
+            Image format, by default ``'png'``
+        **params
+            Encoder options, see :meth:`encode`
+
+        Returns
+        -------
+        :class:`bytes`
+            Bytes of the image
+        """
+        return (await self.render(format, **params)).getvalue()
+
+    async def stream(
+        self, format: str = 'png', chunk_size: int = 64 * 1024, max_chunks: int = 4, **params
+    ) -> AsyncIterator[bytes]:
+        """Encode the image in a thread and yield the encoded chunks while they are written
+
+        The encoder waits while ``max_chunks`` chunks are not consumed yet,
+        so the encoded image is never held in memory as a whole.
+        Recorded operations of :meth:`batch` run before encoding without changing this editor, like in :meth:`render`.
+
+        .. code-block:: python
+
+            response = aiohttp.web.StreamResponse(headers={'Content-Type': 'image/png'})
+            await response.prepare(request)
+            async for chunk in editor.stream():
+                await response.write(chunk)
+
+        Parameters
+        ----------
+        format: :class:`str`, optional
+            Image format, by default ``'png'``. Formats that need to seek in the output are not supported.
+        chunk_size: :class:`int`, optional
+            Size of the yielded chunks in bytes, by default ``65536``. The last chunk can be smaller.
+        max_chunks: :class:`int`, optional
+            Maximum amount of chunks waiting to be consumed, by default ``4``
+        **params
+            Encoder options, see :meth:`encode`
+
+        Yields
+        ------
+        :class:`bytes`
+            Chunks of the encoded image
+        """
+        operations = self._take_operations()
+
+        queue: asyncio.Queue = asyncio.Queue(max_chunks)
+        writer = _ChunkWriter(asyncio.get_running_loop(), queue, chunk_size)
+
+        # The writer lives in this process, so the encoder always runs in a thread
+        encoding = asyncio.ensure_future(_run_in_thread(_stream, self, operations, writer, format, params))
+
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                yield chunk
+
+            await encoding
+        finally:
+            if not encoding.done():
+                # Stopped early, let the encoder fail on its next write
+                writer.closed = True
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.gather(encoding, return_exceptions=True)
+
+    def _take_operations(self) -> List[_Operation]:
+        # Operations recorded by batch so far, they are consumed by render and stream
+        operations = self._operations or []
+        if self._operations is not None:
+            self._operations = []
+
+        return operations
+
+    def _write(self, fp, operations: List[_Operation], format: str, params: Dict[str, Any]) -> None:
+        editor = self
+        if operations:
+            # The operations run on a copy-on-write editor, in a thread just like in a process pool
+            editor = Editor(self.image, copy=False)
+            editor._shared_image = self.image
+            _apply_operations(editor, operations)
+
+        _encode(editor.image, fp, format, **params)
+
+    async def _run(self, func: Callable[..., Editor], *args, **kwargs) -> Editor:
+        # Operations are stored by their mangled name, so they can be pickled for a process pool
+        operation = _Operation(f'_Editor{func.__name__}', args, kwargs)
+
+        if self._operations is not None:
+            self._operations.append(operation)
+            return self
+
+        return await self._execute([operation])
+
+    async def _execute(self, operations: List[_Operation]) -> Editor:
+        if _has_side_effects(operations):
+            # Files, buffers and windows belong to this process, so the chain runs in a thread of it
+            await _run_in_thread(_apply_operations, self, operations)
+            return self
+
+        editor = await run_in_executor(_apply_operations, self, operations)
+
+        # A process pool works on a pickled copy of the editor
+        if editor is not self:
+            self.image = editor.image
+
+        return self
 
 
     async def resize(self, size: Tuple[float, float], crop: bool = False) -> Editor:
@@ -82,11 +424,11 @@ class Editor:
         crop: :class:`bool`, optional
             Crop the image to bypass distortion, by default ``False``
         """
-        return await run_in_executor(self.__resize, size, crop=crop)
+        return await self._run(self.__resize, size, crop=crop)
 
     def __resize(self, size: Tuple[float, float], crop=False) -> Editor:
         if not crop:
-            self.image = self.image.resize(size, Image.ANTIALIAS)
+            self.image = self.image.resize(size, Image.LANCZOS)
 
         else:
             width, height = self.image.size
@@ -105,13 +447,13 @@ class Editor:
                 resize = (0, offset, width, height - offset)
 
             self.image = self.image.crop(resize).resize(
-                (ideal_width, ideal_height), Image.ANTIALIAS
+                (ideal_width, ideal_height), Image.LANCZOS
             )
 
         return self
 
 
-    async def rounded_corners(self, radius: int = 10, offset: int = 2) -> Editor:
+    async def rounded_corners(self, radius: int = 10, offset: int = 2, antialias: int = 1) -> Editor:
         """Make image rounded corners
 
         Parameters
@@ -120,38 +462,33 @@ class Editor:
             Radius of roundness, by default ``10``
         offset: :class:`int`, optional
             Offset pixel while making rounded, by default ``2``
+        antialias: :class:`int`, optional
+            Supersampling factor for smooth edges, by default ``1`` (off).
+            Only the mask is drawn ``antialias`` times bigger, e.g. ``4`` is smooth at a fraction of the cost of drawing the whole image bigger.
         """
-        return await run_in_executor(self.__rounded_corners, radius, offset)
-
-    def __rounded_corners(self, radius: int = 10, offset: int = 2) -> Editor:
-        background = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        holder = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        mask = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        mask_draw = ImageDraw.Draw(mask)
-        mask_draw.rounded_rectangle(
-            (offset, offset) + (self.image.size[0] - offset, self.image.size[1] - offset),
-            radius=radius,
-            fill="black",
-        )
-        holder.paste(self.image, (0, 0))
-        self.image = Image.composite(holder, background, mask)
+        return await self._run(self.__rounded_corners, radius, offset, antialias)
+
+    def __rounded_corners(self, radius: int = 10, offset: int = 2, antialias: int = 1) -> Editor:
+        mask = _rounded_mask(self.image.size, radius, offset, antialias)
+        self.__writable().putalpha(ImageChops.multiply(self.image.getchannel('A'), mask))
 
         return self
 
 
-    async def circle_image(self) -> Editor:
-        """Make image circle"""
-        return await run_in_executor(self.__circle_image)
+    async def circle_image(self, antialias: int = 1) -> Editor:
+        """Make image circle
+
+        Parameters
+        ----------
+        antialias: :class:`int`, optional
+            Supersampling factor for smooth edges, by default ``1`` (off).
+            Only the mask is drawn ``antialias`` times bigger, e.g. ``4`` is smooth at a fraction of the cost of drawing the whole image bigger.
+        """
+        return await self._run(self.__circle_image, antialias)
 
-    def __circle_image(self) -> Editor:
-        background = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        holder = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        mask = Image.new("RGBA", size=self.image.size, color=(255, 255, 255, 0))
-        mask_draw = ImageDraw.Draw(mask)
-        size = tuple(s - 1 for s in self.image.size)
-        mask_draw.ellipse((0, 0) + size, fill="black")
-        holder.paste(self.image, (0, 0))
-        self.image = Image.composite(holder, background, mask)
+    def __circle_image(self, antialias: int = 1) -> Editor:
+        mask = _circle_mask(self.image.size, antialias)
+        self.__writable().putalpha(ImageChops.multiply(self.image.getchannel('A'), mask))
 
         return self
 
@@ -166,7 +503,7 @@ class Editor:
         expand: :class:`bool`, optional
             Expand while rotating, by default ``False``
         """
-        return await run_in_executor(self.__rotate, deg, expand)
+        return await self._run(self.__rotate, deg, expand)
 
     def __rotate(self, deg: float = 0, expand: bool = False) -> Editor:
         self.image = self.image.rotate(angle=deg, expand=expand)
@@ -183,7 +520,7 @@ class Editor:
         amount: :class:`float`, optional
             Amount of blur, by default ``1``
         """
-        return await run_in_executor(self.__blur, mode, amount)
+        return await self._run(self.__blur, mode, amount)
 
     def __blur(self, mode: Literal['box', 'gaussian'] = 'gaussian', amount: float = 1) -> Editor:
         if mode == 'box':
@@ -208,7 +545,7 @@ class Editor:
         on_top: :class:`bool`, optional
             Places image on top, by default ``False``
         """
-        return await run_in_executor(self.__blend, image, alpha, on_top)
+        return await self._run(self.__blend, image, alpha, on_top)
 
     def __blend(
             self, image: Union[Image.Image, Editor, Canvas], alpha: float = 0.0, on_top: bool = False
@@ -216,8 +553,11 @@ class Editor:
         if isinstance(image, Editor) or isinstance(image, Canvas):
             image = image.image
 
+        # Image.blend needs two images of the same size and mode
         if image.size != self.image.size:
-            image = Editor(image).resize(self.image.size, crop=True).image
+            image = Editor(image, copy=False).__resize(self.image.size, crop=True).image
+        elif image.mode != 'RGBA':
+            image = image.convert('RGBA')
 
         if on_top:
             self.image = Image.blend(self.image, image, alpha=alpha)
@@ -244,7 +584,7 @@ class Editor:
         mask: Union[:class:`Image.Image`, :class:`Editor`]
             An optional mask image, by default ``None``
         """
-        return await run_in_executor(self.__paste, image, position, mask)
+        return await self._run(self.__paste, image, position, mask)
 
     def __paste(
             self,
@@ -252,16 +592,25 @@ class Editor:
             position: Tuple[float, float] = (0,0),
             mask: Union[Image.Image, Editor] = None
     ) -> Editor:
-        blank = Image.new('RGBA', size=self.image.size, color=(255, 255, 255, 0))
-
         if isinstance(image, Editor) or isinstance(image, Canvas):
             image = image.image
 
         if mask and isinstance(mask, Editor):
             mask = mask.image
 
-        blank.paste(image, position, mask)
-        self.image = Image.alpha_composite(self.image, blank)
+        if mask:
+            layer = Image.new('RGBA', size=image.size, color=(255, 255, 255, 0))
+            layer.paste(image, (0, 0), mask)
+            image = layer
+        elif image.mode != 'RGBA':
+            image = image.convert('RGBA')
+
+        # Only the region below the image gets composited, parts outside of the editor image are cut off
+        left, top = int(position[0]), int(position[1])
+        source = (max(-left, 0), max(-top, 0))
+
+        if source[0] < image.width and source[1] < image.height:
+            self.__writable().alpha_composite(image, (max(left, 0), max(top, 0)), source)
 
         return self
 
@@ -295,7 +644,7 @@ class Editor:
         stroke_color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
             Color to use for the text stroke. Default to the ``color`` parameter.
         """
-        return await run_in_executor(self.__text, position, text, font, color, align, stroke_width, stroke_color)
+        return await self._run(self.__text, position, text, font, color, align, stroke_width, stroke_color)
 
     def __text(
         self,
@@ -312,9 +661,9 @@ class Editor:
 
         anchors = {'left': 'lt', 'center': 'mt', 'right': 'rt'}
 
-        draw = ImageDraw.Draw(self.image)
-        draw.text(
-            position, text, color,
+        draw = ImageDraw.Draw(self.__writable())
+        _draw_text(
+            draw, position, text, color,
             font=font, anchor=anchors[align],
             stroke_width=stroke_width, stroke_fill=stroke_color
         )
@@ -350,7 +699,7 @@ class Editor:
             Use this as a default if not all of your :class:`Text` classes have a ``stroke_color`` defined.
             If there is no ``stroke_with`` set in this function nor in the :class:`Text` class its default is the ``color`` from the :class:`Text`
         """
-        return await run_in_executor(self.__multicolor_text, position, texts, space_separated, align, stroke_width, stroke_color)
+        return await self._run(self.__multicolor_text, position, texts, space_separated, align, stroke_width, stroke_color)
 
     def __multicolor_text(
         self,
@@ -361,44 +710,33 @@ class Editor:
         stroke_width: int = 0,
         stroke_color: Union[Tuple[int, int, int], str, int] = None,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
-
-        if align == 'left':
-            position = position
-
-        if align == 'right':
-            total_width = 0
-
-            for text in texts:
-                total_width += text.font.getsize(text.text)[0]
+        draw = ImageDraw.Draw(self.__writable())
 
-            position = (position[0] - total_width, position[1])
+        # Every text is measured once, the lengths are reused for aligning and advancing
+        widths = [
+            _text_length(text.font, text.text) + (_text_length(text.font, ' ') if space_separated else 0)
+            for text in texts
+        ]
 
-        if align == 'center':
-            total_width = 0
-
-            for text in texts:
-                total_width += text.font.getsize(text.text)[0]
+        if align in ('right', 'center') and texts:
+            total_width = sum(widths)
+            if space_separated:
+                total_width -= _text_length(texts[-1].font, ' ')
 
-            position = (position[0] - (total_width / 2), position[1])
+            if align == 'right':
+                position = (position[0] - total_width, position[1])
+            else:
+                position = (position[0] - (total_width / 2), position[1])
 
-        for text in texts:
+        for text, width in zip(texts, widths):
             _sentence = text.text
             _font = text.font
             _color = text.color
             _stroke_width = text.stroke_width if text.stroke_width is not None else stroke_width
             _stroke_color = text.stroke_color or stroke_color or text.color
 
-            if space_separated:
-                width, _ = (
-                    _font.getsize(_sentence)[0] + _font.getsize(' ')[0],
-                    _font.getsize(_sentence)[1],
-                )
-            else:
-                width, _ = _font.getsize(_sentence)
-
-            draw.text(
-                position, _sentence, _color, _font,
+            _draw_text(
+                draw, position, _sentence, _color, _font,
                 stroke_width=_stroke_width, stroke_fill=_stroke_color
             )
             position = (position[0] + width, position[1])
@@ -411,8 +749,8 @@ class Editor:
         position: Tuple[float, float],
         width: float,
         height: float,
-        fill: Union[str, int, Tuple[int, int, int]] = None,
-        color: Union[str, int, Tuple[int, int, int]] = None,
+        fill: Union[str, int, Tuple[int, int, int], Gradient] = None,
+        color: Union[str, int, Tuple[int, int, int], Gradient] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
         radius: int = 0,
@@ -427,9 +765,9 @@ class Editor:
             Width of rectangle
         height: :class:`float`
             Height of rectangle
-        fill: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`,], optional
+        fill: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`, :class:`Gradient`], optional
             Fill color, by default None
-        color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
+        color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`, :class:`Gradient`], optional
             Alias of fill, by default ``None``
         outline: :class:`Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
             Outline color, by default ``None``
@@ -438,20 +776,20 @@ class Editor:
         radius: :class:`int`, optional
             Radius of rectangle, by default ``0``
         """
-        return await run_in_executor(self.__rectangle, position, width, height, fill, color, outline, stroke_width, radius)
+        return await self._run(self.__rectangle, position, width, height, fill, color, outline, stroke_width, radius)
 
     def __rectangle(
         self,
         position: Tuple[float, float],
         width: float,
         height: float,
-        fill: Union[str, int, Tuple[int, int, int]] = None,
-        color: Union[str, int, Tuple[int, int, int]] = None,
+        fill: Union[str, int, Tuple[int, int, int], Gradient] = None,
+        color: Union[str, int, Tuple[int, int, int], Gradient] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
         radius: int = 0,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
 
         to_width = width + position[0]
         to_height = height + position[1]
@@ -459,6 +797,12 @@ class Editor:
         if color:
             fill = color
 
+        if isinstance(fill, Gradient):
+            self.__gradient(fill, position + (to_width, to_height), radius)
+            if outline is None:
+                return self
+            fill = None
+
         if radius <= 0:
             draw.rectangle(
                 position + (to_width, to_height),
@@ -484,8 +828,8 @@ class Editor:
         max_width: Union[int, float],
         height: Union[int, float],
         percentage: int = 1,
-        fill: Union[str, int, Tuple[int, int, int]] = None,
-        color: Union[str, int, Tuple[int, int, int]] = None,
+        fill: Union[str, int, Tuple[int, int, int], Gradient] = None,
+        color: Union[str, int, Tuple[int, int, int], Gradient] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
         radius: int = 0,
@@ -502,9 +846,9 @@ class Editor:
             Height of the bar
         percentage: :class:`int`, optional
             Percentage to fill of the bar, by default 1
-        fill: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
-            Fill color, by default ``None``
-        color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
+        fill: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`, :class:`Gradient`], optional
+            Fill color, by default ``None``. A gradient spans the whole ``max_width`` and is revealed as the bar fills up.
+        color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`, :class:`Gradient`], optional
             Alias of fill, by default ``None``
         outline: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
             Outline color, by default ``None``
@@ -513,7 +857,7 @@ class Editor:
         radius: :class:`int`, optional
             Radius of the bar, by default ``0``
         """
-        return await run_in_executor(self.__bar, position, max_width, height, percentage, fill, color, outline, stroke_width, radius)
+        return await self._run(self.__bar, position, max_width, height, percentage, fill, color, outline, stroke_width, radius)
 
     def __bar(
         self,
@@ -521,13 +865,13 @@ class Editor:
         max_width: Union[int, float],
         height: Union[int, float],
         percentage: int = 1,
-        fill: Union[str, int, Tuple[int, int, int]] = None,
-        color: Union[str, int, Tuple[int, int, int]] = None,
+        fill: Union[str, int, Tuple[int, int, int], Gradient] = None,
+        color: Union[str, int, Tuple[int, int, int], Gradient] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
         radius: int = 0,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
 
         if color:
             fill = color
@@ -537,6 +881,12 @@ class Editor:
 
         height = height + position[1]
 
+        if isinstance(fill, Gradient):
+            self.__gradient(fill, position + (to_width, height), radius, (max_width + 1, height - position[1] + 1))
+            if outline is None:
+                return self
+            fill = None
+
         if radius <= 0:
             draw.rectangle(
                 position + (to_width, height),
@@ -556,6 +906,34 @@ class Editor:
         return self
 
 
+    def __gradient(
+        self,
+        gradient: Gradient,
+        xy: Tuple[float, float, float, float],
+        radius: int = 0,
+        size: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        # Pastes a rectangle filled with a crop of the cached gradient,
+        # the pixels are replaced like ImageDraw does instead of being composited
+        left, top = math.floor(xy[0]), math.floor(xy[1])
+        box = (math.floor(xy[2]) - left + 1, math.floor(xy[3]) - top + 1)
+        if box[0] <= 0 or box[1] <= 0:
+            return
+
+        image = gradient.image(size or box)
+        if image.size != box:
+            image = image.crop((0, 0) + box)
+
+        mask = None
+        if radius > 0:
+            mask = Image.new('L', box, 0)
+            ImageDraw.Draw(mask).rounded_rectangle(
+                (xy[0] - left, xy[1] - top, xy[2] - left, xy[3] - top), radius=radius, fill=255
+            )
+
+        self.__writable().paste(image, (left, top), mask)
+
+
     async def rounded_bar(
         self,
         position: Tuple[float, float],
@@ -565,6 +943,7 @@ class Editor:
         fill: Union[str, int, Tuple[int, int, int]] = None,
         color: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
         """Draw a rounded bar
 
@@ -584,8 +963,13 @@ class Editor:
             Alias of color, by default ``None``
         stroke_width: :class:`float`, optional
             Stroke width, by default ``1``
+        antialias: :class:`int`, optional
+            Supersampling factor for smooth edges, by default ``1`` (off).
+            Only the shape is drawn ``antialias`` times bigger, e.g. ``4`` is smooth at a fraction of the cost of drawing the whole image bigger.
         """
-        return await run_in_executor(self.__rounded_bar, position, width, height, percentage, fill, color, stroke_width)
+        return await self._run(
+            self.__rounded_bar, position, width, height, percentage, fill, color, stroke_width, antialias
+        )
 
     def __rounded_bar(
         self,
@@ -596,8 +980,9 @@ class Editor:
         fill: Union[str, int, Tuple[int, int, int]] = None,
         color: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
 
         if color:
             fill = color
@@ -605,6 +990,11 @@ class Editor:
         start = -90
         end = (percentage * 3.6) - 90
 
+        if antialias > 1:
+            xy = position + (position[0] + width, position[1] + height)
+            self.__draw_arc(xy, start, end, fill, stroke_width, antialias)
+            return self
+
         draw.arc(
             position + (position[0] + width, position[1] + height),
             start,
@@ -625,6 +1015,7 @@ class Editor:
         color: Union[str, int, Tuple[int, int, int]] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
         """Draw an ellipse
 
@@ -644,8 +1035,11 @@ class Editor:
             Outline color, by default ``None``
         stroke_width: :class:`float`, optional
             Stroke width, by default ``1``
+        antialias: :class:`int`, optional
+            Supersampling factor for smooth edges, by default ``1`` (off).
+            Only the shape is drawn ``antialias`` times bigger, e.g. ``4`` is smooth at a fraction of the cost of drawing the whole image bigger.
         """
-        return await run_in_executor(self.__ellipse, position, width, height, fill, color, outline, stroke_width)
+        return await self._run(self.__ellipse, position, width, height, fill, color, outline, stroke_width, antialias)
 
     def __ellipse(
         self,
@@ -656,14 +1050,27 @@ class Editor:
         color: Union[str, int, Tuple[int, int, int]] = None,
         outline: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
         to_width = width + position[0]
         to_height = height + position[1]
 
         if color:
             fill = color
 
+        if antialias > 1:
+            if fill is None and outline is None:
+                # Like ImageDraw, a shape without colors gets a white outline
+                outline = 'white'
+
+            stroke = round(stroke_width * antialias)
+            self.__draw_antialiased(position + (to_width, to_height), antialias, [
+                (fill, lambda mask, box: mask.ellipse(box, fill=255)),
+                (outline, lambda mask, box: mask.ellipse(box, outline=255, width=stroke)),
+            ])
+            return self
+
         draw.ellipse(
             position + (to_width, to_height),
             outline=outline,
@@ -694,7 +1101,7 @@ class Editor:
         outline: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
             Outline color, by default ``None``
         """
-        return await run_in_executor(self.__polygon, coordinates, fill, color, outline)
+        return await self._run(self.__polygon, coordinates, fill, color, outline)
 
     def __polygon(
         self,
@@ -706,7 +1113,7 @@ class Editor:
         if color:
             fill = color
 
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
         draw.polygon(coordinates, fill=fill, outline=outline)
 
         return self
@@ -722,6 +1129,7 @@ class Editor:
         fill: Union[str, int, Tuple[int, int, int]] = None,
         color: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
         """Draw arc
 
@@ -743,8 +1151,11 @@ class Editor:
             Alias of fill, by default ``None``
         stroke_width: :class:`float`, optional
             Stroke width, by default ``1``
+        antialias: :class:`int`, optional
+            Supersampling factor for smooth edges, by default ``1`` (off).
+            Only the shape is drawn ``antialias`` times bigger, e.g. ``4`` is smooth at a fraction of the cost of drawing the whole image bigger.
         """
-        return await run_in_executor(self.__arc, position, width, height, start, rotation, fill, color, stroke_width)
+        return await self._run(self.__arc, position, width, height, start, rotation, fill, color, stroke_width, antialias)
 
     def __arc(
         self,
@@ -756,8 +1167,9 @@ class Editor:
         fill: Union[str, int, Tuple[int, int, int]] = None,
         color: Union[str, int, Tuple[int, int, int]] = None,
         stroke_width: float = 1,
+        antialias: int = 1,
     ) -> Editor:
-        draw = ImageDraw.Draw(self.image)
+        draw = ImageDraw.Draw(self.__writable())
 
         start = start - 90
         end = rotation - 90
@@ -765,6 +1177,11 @@ class Editor:
         if color:
             fill = color
 
+        if antialias > 1:
+            xy = position + (position[0] + width, position[1] + height)
+            self.__draw_arc(xy, start, end, fill, stroke_width, antialias)
+            return self
+
         draw.arc(
             position + (position[0] + width, position[1] + height),
             start,
@@ -776,9 +1193,57 @@ class Editor:
         return self
 
 
+    def __draw_arc(
+        self,
+        xy: Tuple[float, float, float, float],
+        start: float,
+        end: float,
+        fill: Union[str, int, Tuple[int, int, int]],
+        stroke_width: float,
+        antialias: int,
+    ) -> None:
+        if fill is None:
+            # Like ImageDraw, an arc without color is white
+            fill = 'white'
+
+        stroke = round(stroke_width * antialias)
+        self.__draw_antialiased(xy, antialias, [
+            (fill, lambda mask, box: mask.arc(box, start, end, 255, width=stroke)),
+        ])
+
+    def __draw_antialiased(
+        self,
+        xy: Tuple[float, float, float, float],
+        antialias: int,
+        shapes: List[Tuple[Any, Callable[[ImageDraw.ImageDraw, Tuple[float, float, float, float]], None]]],
+    ) -> None:
+        # Only the bounding box of the shape is drawn bigger, the reduced mask blends the edges
+        left, top = math.floor(xy[0]), math.floor(xy[1])
+        right, bottom = math.floor(xy[2]) + 1, math.floor(xy[3]) + 1
+        if right <= left or bottom <= top:
+            return
+
+        size = ((right - left) * antialias, (bottom - top) * antialias)
+        scaled = (
+            (xy[0] - left) * antialias,
+            (xy[1] - top) * antialias,
+            (xy[2] - left + 1) * antialias - 1,
+            (xy[3] - top + 1) * antialias - 1,
+        )
+
+        image = self.__writable()
+        for ink, shape in shapes:
+            if ink is None:
+                continue
+
+            mask = Image.new('L', size, 0)
+            shape(ImageDraw.Draw(mask), scaled)
+            image.paste(ink, (left, top, right, bottom), mask.reduce(antialias))
+
+
     async def show(self):
         """Show the image."""
-        return await run_in_executor(self.__show)
+        await self._run(self.__show)
 
     def __show(self):
         self.image.show()
@@ -794,7 +1259,206 @@ class Editor:
         format: :class:`str`, optional
             File format, by default ``None``
         """
-        return await run_in_executor(self.__save, fp, format, **params)
+        await self._run(self.__save, fp, format, **params)
 
     def __save(self, fp, format: str = None, **params):
         self.image.save(fp, format, **params)
+
+
+def _circle_mask(size: Tuple[int, int], antialias: int = 1) -> Image.Image:
+    key = ('circle', size, antialias)
+    mask = _mask_cache.get(key)
+
+    if mask is None:
+        mask = Image.new('L', (size[0] * antialias, size[1] * antialias), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, size[0] * antialias - 1, size[1] * antialias - 1), fill=255)
+        if antialias > 1:
+            mask = mask.reduce(antialias)
+        _mask_cache.set(key, mask)
+
+    return mask
+
+
+def _rounded_mask(size: Tuple[int, int], radius: int, offset: int, antialias: int = 1) -> Image.Image:
+    key = ('rounded', size, radius, offset, antialias)
+    mask = _mask_cache.get(key)
+
+    if mask is None:
+        mask = Image.new('L', (size[0] * antialias, size[1] * antialias), 0)
+        ImageDraw.Draw(mask).rounded_rectangle(
+            (
+                offset * antialias,
+                offset * antialias,
+                (size[0] - offset + 1) * antialias - 1,
+                (size[1] - offset + 1) * antialias - 1,
+            ),
+            radius=radius * antialias,
+            fill=255,
+        )
+        if antialias > 1:
+            mask = mask.reduce(antialias)
+        _mask_cache.set(key, mask)
+
+    return mask
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _image_digest(image: Image.Image, shared: bool = False) -> bytes:
+    if shared:
+        entry = _image_digests.get(id(image))
+        if entry is not None and entry[0]() is image:
+            return entry[1]
+
+    digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+    digest.update(f'{image.mode}{image.size}'.encode())
+    digest = digest.digest()
+
+    if shared:
+        key = id(image)
+        _image_digests[key] = (weakref.ref(image, lambda _: _image_digests.pop(key, None)), digest)
+
+    return digest
+
+
+def _fingerprint(value: Any) -> Any:
+    if value is None or isinstance(value, (str, bytes, int, float)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return tuple(_fingerprint(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _fingerprint(item)) for key, item in value.items()))
+    if isinstance(value, Image.Image):
+        return _image_digest(value)
+    if isinstance(value, Editor) and not value._cacheable:
+        raise _Uncacheable
+    if isinstance(value, Editor):
+        return _image_digest(value.image, value.image is value._shared_image)
+    if isinstance(value, Canvas):
+        return _image_digest(value.image)
+    if isinstance(value, Font):
+        return _fingerprint((value.path, value.size, value.kwargs))
+    if isinstance(value, ImageFont.FreeTypeFont) and isinstance(value.path, str):
+        return _font_key(value)
+    if isinstance(value, Gradient):
+        return _fingerprint(value._key)
+    if isinstance(value, Text):
+        return _fingerprint((value.text, value.font, value.color, value.stroke_width, value.stroke_color))
+
+    raise _Uncacheable
+
+
+def _render_key(
+    editor: Editor, operations: List[_Operation], format: str, params: Dict[str, Any]
+) -> Optional[bytes]:
+    if _has_side_effects(operations):
+        return None
+
+    try:
+        fingerprint = (_fingerprint(editor), _fingerprint(operations), format.lower(), _fingerprint(params))
+    except _Uncacheable:
+        return None
+
+    return hashlib.blake2b(repr(fingerprint).encode(), digest_size=32).digest()
+
+
+class _Operation(NamedTuple):
+    name: str
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+
+
+def _has_side_effects(operations: List[_Operation]) -> bool:
+    return any(operation.name in _SIDE_EFFECTS for operation in operations)
+
+
+def _apply_operations(editor: Editor, operations: List[_Operation]) -> Editor:
+    for name, args, kwargs in operations:
+        getattr(editor, name)(*args, **kwargs)
+
+    return editor
+
+
+def _encode(
+    image: Image.Image,
+    fp,
+    format: str,
+    quality: Optional[int] = None,
+    compress_level: Optional[int] = None,
+    optimize: bool = False,
+    background: Union[Tuple[int, int, int], str, int] = 'white',
+    **params,
+) -> None:
+    format = format.lower()
+    if format == 'jpg':
+        format = 'jpeg'
+
+    if format in ('jpeg', 'bmp') and image.mode == 'RGBA':
+        flattened = Image.new('RGB', image.size, background)
+        flattened.paste(image, mask=image.getchannel('A'))
+        image = flattened
+
+    if quality is not None:
+        params['quality'] = quality
+    if compress_level is not None:
+        params['compress_level'] = compress_level
+    if optimize:
+        params['optimize'] = optimize
+
+    image.save(fp, format, **params)
+
+
+class _ChunkWriter:
+    # File object handing the written data in chunks over to a queue of the event loop
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, chunk_size: int) -> None:
+        self.loop = loop
+        self.queue = queue
+        self.chunk_size = chunk_size
+        self.closed = False
+
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+
+        while len(self._buffer) >= self.chunk_size:
+            self.put(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def put(self, chunk: Optional[bytes]) -> None:
+        if self.closed:
+            raise ValueError('Stream was closed')
+
+        # Blocks the encoder thread while the queue is full
+        asyncio.run_coroutine_threadsafe(self.queue.put(chunk), self.loop).result()
+
+    def finish(self) -> None:
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+        self.put(None)
+
+
+def _stream(
+    editor: Editor, operations: List[_Operation], writer: _ChunkWriter, format: str, params: Dict[str, Any]
+) -> None:
+    try:
+        editor._write(writer, operations, format, params)
+    finally:
+        # The end of the stream is signalled even if encoding failed, the error is raised by the stream
+        if not writer.closed:
+            writer.finish()
+
+
+def _render(editor: Editor, operations: List[_Operation], format: str, params: Dict[str, Any]) -> bytes:
+    _bytes = BytesIO()
+    editor._write(_bytes, operations, format, params)
+    return _bytes.getvalue()
@@ -26,7 +26,9 @@ SOFTWARE.
 import os
 
 from PIL import ImageFont
-from typing import Literal, Optional
+from typing import Any, Dict, Literal, Optional
+
+from .cache import LRUCache
 
 fonts_directory = os.path.join(os.path.dirname(__file__), 'fonts')
 fonts_path = {
@@ -51,9 +53,64 @@ fonts_path = {
 }
 
 
+_font_cache: Optional[LRUCache] = LRUCache(maxsize=128)
+
+
+def set_font_cache(maxsize: Optional[int] = 128) -> Optional[LRUCache]:
+    """Set the size of the font cache
+
+    Fonts loaded from a path are cached by path, size and options, so creating the same :class:`Font`
+    again doesn't read and parse the font file.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`, optional
+        Maximum amount of cached fonts, by default ``128``. Set this to ``None`` to disable the cache.
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The new cache
+    """
+    global _font_cache
+
+    _font_cache = LRUCache(maxsize=maxsize) if maxsize is not None else None
+    return _font_cache
+
+
+def get_font_cache() -> Optional[LRUCache]:
+    """Get the font cache
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The cache set with :func:`set_font_cache`, ``None`` if it is disabled
+    """
+    return _font_cache
+
+
+def _load_font(path, size: Optional[int], **kwargs) -> ImageFont.FreeTypeFont:
+    cache = _font_cache
+
+    # File objects are read when the font gets created, only paths can be cached
+    if cache is None or not isinstance(path, (str, bytes, os.PathLike)):
+        return ImageFont.truetype(path, size=size, **kwargs)
+
+    key = (os.fspath(path), size, tuple(sorted(kwargs.items())))
+    font = cache.get(key)
+
+    if font is None:
+        font = ImageFont.truetype(path, size=size, **kwargs)
+        cache.set(key, font)
+
+    return font
+
+
 class Font:
     """Font class
 
+    Fonts are cached, see :func:`set_font_cache`.
+
     Parameters
     ----------
     path: :class:`str`
@@ -63,7 +120,15 @@ class Font:
     """
 
     def __init__(self, path: str, size: Optional[int] = 10, **kwargs) -> None:
-        self.font = ImageFont.truetype(path, size=size, **kwargs)
+        self.path = path
+        self.size = size
+        self.kwargs: Dict[str, Any] = kwargs
+
+        self.font = _load_font(path, size=size, **kwargs)
+
+    def __reduce__(self):
+        # Unpickled fonts (e.g. in a process pool) are loaded through the cache as well
+        return _restore_font, (self.path, self.size, self.kwargs)
 
     @classmethod
     def poppins(
@@ -117,4 +182,8 @@ class Font:
         size: :class:`int`, optional
             Font size, by default ``10``
         """
-        return cls(fonts_path['montserrat'][variant], size, **kwargs)
\ No newline at end of file
+        return cls(fonts_path['montserrat'][variant], size, **kwargs)
+
+
+def _restore_font(path, size: Optional[int], kwargs: Dict[str, Any]) -> Font:
+    return Font(path, size, **kwargs)
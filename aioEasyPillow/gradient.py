@@ -0,0 +1,168 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PIL import Image, ImageColor
+from typing_extensions import Literal
+
+from .cache import LRUCache
+
+Color = Union[Tuple[int, int, int], Tuple[int, int, int, int], str]
+
+# Gradients are mostly the same few backgrounds and bars
+_gradient_cache = LRUCache(maxsize=32 * 1024 * 1024, getsizeof=lambda image: image.width * image.height * 4)
+
+
+class Gradient:
+    """Gradient with multiple colors
+
+    Gradients can be used as color of a :class:`Canvas` and as fill of :meth:`Editor.rectangle`
+    and :meth:`Editor.bar`. Rendered gradients are cached by their size and colors.
+
+    .. code-block:: python
+
+        gradient = Gradient(['#5865F2', '#EB459E'])
+        await editor.bar((30, 200), max_width=650, height=30, percentage=level, fill=gradient, radius=15)
+
+    Parameters
+    ----------
+    colors: Sequence[Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`]]
+        Colors of the gradient, at least two
+    stops: Sequence[:class:`float`], optional
+        Position of every color from ``0.0`` to ``1.0``, by default ``None`` (evenly spaced)
+    mode: Literal['linear', 'radial'], optional
+        Linear gradient or radial gradient from the center to the corners, by default ``'linear'``.
+        The last stop of a radial gradient is reached at the corners, the middle of the edges is at ``0.7``.
+    angle: :class:`float`, optional
+        Direction of a linear gradient in degrees, by default ``0`` (left to right). ``90`` is top to bottom.
+
+    Raises
+    ------
+    ValueError
+        When there are less than two colors or ``stops`` doesn't match ``colors``
+    """
+
+    def __init__(
+        self,
+        colors: Sequence[Color],
+        stops: Optional[Sequence[float]] = None,
+        mode: Literal['linear', 'radial'] = 'linear',
+        angle: float = 0,
+    ) -> None:
+        if len(colors) < 2:
+            raise ValueError('A gradient needs at least two colors')
+
+        if stops is None:
+            stops = [index / (len(colors) - 1) for index in range(len(colors))]
+        elif len(stops) != len(colors):
+            raise ValueError('stops must have one position for every color')
+
+        self.colors: Tuple[Tuple[int, int, int, int], ...] = tuple(_rgba(color) for color in colors)
+        self.stops: Tuple[float, ...] = tuple(stops)
+        self.mode = mode
+        self.angle = angle
+
+    @property
+    def _key(self) -> Tuple:
+        return self.colors, self.stops, self.mode, self.angle % 360
+
+    def image(self, size: Tuple[int, int]) -> Image.Image:
+        """Render the gradient
+
+        Parameters
+        ----------
+        size: Tuple[:class:`int`, :class:`int`]
+            Size of the image
+
+        Returns
+        -------
+        :class:`Image.Image`
+            RGBA image of the gradient, it is cached and must not be changed
+        """
+        size = (max(int(size[0]), 1), max(int(size[1]), 1))
+        key = (size, self._key)
+
+        image = _gradient_cache.get(key)
+        if image is None:
+            image = self._render(size)
+            _gradient_cache.set(key, image)
+
+        return image
+
+    def _render(self, size: Tuple[int, int]) -> Image.Image:
+        if self.mode == 'radial':
+            # Image.radial_gradient reaches 255 at the corners and about 179 at the middle of the edges
+            ramp = Image.radial_gradient('L')
+        else:
+            ramp = _linear_ramp(self.angle % 360)
+
+        # The ramp goes from 0 to 255, every band maps it to the colors of the stops
+        ramp = ramp.resize(size, Image.BILINEAR)
+        table = _color_table(self.colors, self.stops)
+
+        return Image.merge('RGBA', [ramp.point([color[band] for color in table]) for band in range(4)])
+
+
+def _rgba(color: Color) -> Tuple[int, int, int, int]:
+    if isinstance(color, str):
+        color = ImageColor.getrgb(color)
+
+    return tuple(color) + (255,) if len(color) == 3 else tuple(color)
+
+
+def _linear_ramp(angle: float) -> Image.Image:
+    # Image.linear_gradient goes from top to bottom, a bigger ramp is rotated so the cropped square
+    # still reaches from one corner to the opposite one
+    radians = math.radians(angle)
+    length = round(256 * (abs(math.cos(radians)) + abs(math.sin(radians))))
+
+    ramp = Image.linear_gradient('L').resize((length, length), Image.BILINEAR).rotate(90 - angle, Image.BILINEAR)
+    offset = (length - 256) // 2
+    return ramp.crop((offset, offset, offset + 256, offset + 256))
+
+
+def _color_table(colors: Sequence[Tuple[int, ...]], stops: Sequence[float]) -> List[Tuple[int, ...]]:
+    table = []
+
+    for index in range(256):
+        position = index / 255
+
+        # Colors before the first and after the last stop are solid
+        if position <= stops[0]:
+            table.append(colors[0])
+            continue
+        if position >= stops[-1]:
+            table.append(colors[-1])
+            continue
+
+        for (start, first), (end, last) in zip(zip(stops, colors), zip(stops[1:], colors[1:])):
+            if start <= position <= end:
+                ratio = (position - start) / (end - start) if end > start else 0
+                table.append(tuple(round(a + (b - a) * ratio) for a, b in zip(first, last)))
+                break
+
+    return table
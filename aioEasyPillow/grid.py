@@ -0,0 +1,223 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from .animated import AnimatedEditor
+from .canvas import Canvas
+from .editor import Editor, _encode
+from .utils import _run_in_thread, run_in_executor
+
+Child = Union[Image.Image, Editor, Canvas, Awaitable[Any], Callable[[], Awaitable[Any]]]
+
+
+class Grid:
+    """Layout of many images in rows and columns on a single image
+
+    The children are created concurrently and pasted into one image in a single executor call,
+    every child is composited only into its own cell.
+
+    .. code-block:: python
+
+        leaderboard = Grid(columns=1, spacing=10, padding=20, color='#23272A')
+
+        editor = await leaderboard.compose(
+            template.fill(name=member.name, level=member.level) for member in members
+        )
+
+    Parameters
+    ----------
+    columns: :class:`int`, optional
+        Amount of columns, by default ``1`` (a vertical stack). ``None`` puts all children in one row.
+    spacing: Union[:class:`int`, Tuple[:class:`int`, :class:`int`]], optional
+        Space between the cells, by default ``0``. A tuple sets the horizontal and vertical space.
+    padding: :class:`int`, optional
+        Space around the cells, by default ``0``
+    background: Union[:class:`Image.Image`, :class:`Editor`, :class:`Canvas`], optional
+        Image the children are pasted on, by default ``None``.
+        If not set, a new image fitting all cells is created.
+    color: Union[Tuple[:class:`int`, :class:`int`, :class:`int`], :class:`str`, :class:`int`], optional
+        Color of the new image if there is no ``background``, by default ``(0, 0, 0, 0)`` (transparent)
+    concurrency: :class:`int`, optional
+        Maximum amount of children created at the same time, by default ``4``
+    """
+
+    def __init__(
+        self,
+        columns: Optional[int] = 1,
+        spacing: Union[int, Tuple[int, int]] = 0,
+        padding: int = 0,
+        background: Optional[Union[Image.Image, Editor, Canvas]] = None,
+        color: Union[Tuple[int, int, int, int], str, int] = (0, 0, 0, 0),
+        concurrency: int = 4,
+    ) -> None:
+        self.columns = columns
+        self.spacing = (spacing, spacing) if isinstance(spacing, int) else spacing
+        self.padding = padding
+        self.background = background
+        self.color = color
+        self.concurrency = concurrency
+
+    def layout(self, sizes: Sequence[Tuple[int, int]]) -> Tuple[Tuple[int, int], List[Tuple[int, int]]]:
+        """Calculate the size of the image and the position of every child
+
+        Every column is as wide as its widest child and every row is as high as its highest child,
+        children are placed at the top left corner of their cell.
+
+        Parameters
+        ----------
+        sizes: Sequence[Tuple[:class:`int`, :class:`int`]]
+            Sizes of the children
+
+        Returns
+        -------
+        Tuple[Tuple[:class:`int`, :class:`int`], List[Tuple[:class:`int`, :class:`int`]]]
+            Size of the image fitting all cells and the positions of the children
+        """
+        columns = max(min(self.columns or len(sizes), len(sizes)), 1)
+        rows = (len(sizes) + columns - 1) // columns
+
+        widths = [max((size[0] for size in sizes[column::columns]), default=0) for column in range(columns)]
+        heights = [max(size[1] for size in sizes[row * columns:(row + 1) * columns]) for row in range(rows)]
+
+        lefts = [self.padding + sum(widths[:column]) + column * self.spacing[0] for column in range(columns)]
+        tops = [self.padding + sum(heights[:row]) + row * self.spacing[1] for row in range(rows)]
+        positions = [(lefts[index % columns], tops[index // columns]) for index in range(len(sizes))]
+
+        width = sum(widths) + self.spacing[0] * (columns - 1) + self.padding * 2
+        height = sum(heights) + self.spacing[1] * max(rows - 1, 0) + self.padding * 2
+        return (width, height), positions
+
+    async def compose(self, children: Iterable[Child]) -> Editor:
+        """Create the children and paste them into their cells
+
+        Parameters
+        ----------
+        children: Iterable[Union[:class:`Image.Image`, :class:`Editor`, :class:`Canvas`, Awaitable, Callable[[], Awaitable]]]
+            Images, or coroutines and coroutine functions creating them like :meth:`Template.fill`
+
+        Returns
+        -------
+        :class:`Editor`
+            Editor of the new image
+        """
+        images = await self._images(children)
+        layout = self.layout([image.size for image in images])
+        background = await _image(self.background)
+
+        image = await run_in_executor(_compose, background, self.color, images, layout)
+        return Editor(image, copy=False)
+
+    async def render(self, children: Iterable[Child], format: str = 'png', **params) -> BytesIO:
+        """Create the children, paste them into their cells and encode the image
+
+        Same as :meth:`compose` followed by :meth:`Editor.render`, pasting and encoding
+        run in a single executor call.
+
+        Parameters
+        ----------
+        children: Iterable[Union[:class:`Image.Image`, :class:`Editor`, :class:`Canvas`, Awaitable, Callable[[], Awaitable]]]
+            Images, or coroutines and coroutine functions creating them like :meth:`Template.fill`
+        format: :class:`str`, optional
+            Image format, by default ``'png'``
+        **params
+            Encoder options, see :meth:`Editor.encode`
+
+        Returns
+        -------
+        :class:`BytesIO`
+            Bytes of the new image
+        """
+        images = await self._images(children)
+        layout = self.layout([image.size for image in images])
+        background = await _image(self.background)
+
+        data = await run_in_executor(_render_grid, background, self.color, images, layout, format, params)
+        return BytesIO(data)
+
+    async def _images(self, children: Iterable[Child]) -> List[Image.Image]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _create(child: Child) -> Image.Image:
+            if callable(child):
+                child = child()
+            if inspect.isawaitable(child):
+                async with semaphore:
+                    child = await child
+
+            return await _image(child)
+
+        return list(await asyncio.gather(*(_create(child) for child in children)))
+
+
+async def _image(value: Optional[Union[Image.Image, Editor, Canvas]]) -> Optional[Image.Image]:
+    if isinstance(value, AnimatedEditor):
+        # Its first frame is edited on first access, which must not block the event loop
+        return await _run_in_thread(getattr, value, 'image')
+    if isinstance(value, (Editor, Canvas)):
+        return value.image
+    return value
+
+
+def _compose(
+    background: Optional[Image.Image],
+    color: Union[Tuple[int, int, int], str, int],
+    images: List[Image.Image],
+    layout: Tuple[Tuple[int, int], List[Tuple[int, int]]],
+) -> Image.Image:
+    size, positions = layout
+
+    # The children are composited in place, only the region of their cell changes
+    if background is not None:
+        image = background.convert('RGBA') if background.mode != 'RGBA' else background.copy()
+    else:
+        image = Image.new('RGBA', size, color)
+
+    for child, position in zip(images, positions):
+        if child.mode != 'RGBA':
+            child = child.convert('RGBA')
+        image.alpha_composite(child, position)
+
+    return image
+
+
+def _render_grid(
+    background: Optional[Image.Image],
+    color: Union[Tuple[int, int, int], str, int],
+    images: List[Image.Image],
+    layout: Tuple[Tuple[int, int], List[Tuple[int, int]]],
+    format: str,
+    params: Dict[str, Any],
+) -> bytes:
+    _bytes = BytesIO()
+    _encode(_compose(background, color, images, layout), _bytes, format, **params)
+    return _bytes.getvalue()
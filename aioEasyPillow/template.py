@@ -0,0 +1,214 @@
+"""
+MIT License
+
+Copyright (c) 2021-2022 shahriyardx
+Copyright (c) 2022-present Guddi
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from PIL import Image
+
+from .canvas import Canvas
+from .editor import Editor
+
+Layer = Callable[[Editor], Awaitable[Any]]
+Slot = Callable[[Editor, Any], Awaitable[Any]]
+
+
+class Template:
+    """Template of an image with static layers and dynamic slots
+
+    The static layers are drawn once onto the base image, every image created from the template
+    starts from a copy of that prepared base and only draws its slots.
+
+    .. code-block:: python
+
+        template = Template(Canvas((900, 300), color='#23272A'))
+
+        @template.layer
+        async def background(editor):
+            await editor.polygon([(600, 0), (750, 300), (900, 300), (900, 0)], '#2C2F33')
+
+        @template.slot('name')
+        async def name(editor, value):
+            await editor.text((200, 40), value, font=Font.montserrat('bold', size=40), color='white')
+
+        editor = await template.fill(name='Guddi#9552')
+
+    Parameters
+    ----------
+    base: Union[:class:`Image.Image`, :class:`str`, :class:`BytesIO`, :class:`Editor`, :class:`Canvas`]
+        Image the static layers are drawn on
+    """
+
+    def __init__(self, base: Union[Image.Image, str, BytesIO, Editor, Canvas]) -> None:
+        self.base = base
+
+        self._layers: List[Layer] = []
+        self._slots: Dict[str, Slot] = {}
+        self._prepared: Optional[Editor] = None
+        self._preparing: Optional[asyncio.Task] = None
+
+    @property
+    def slots(self) -> List[str]:
+        """Names of the slots in the order they are drawn"""
+        return list(self._slots)
+
+    def layer(self, func: Layer) -> Layer:
+        """Decorator to add a static layer
+
+        The function gets the :class:`Editor` of the base image. Layers are drawn in the order they are added.
+
+        Parameters
+        ----------
+        func: Callable[[:class:`Editor`], Awaitable]
+            Coroutine function drawing the layer
+        """
+        self._layers.append(func)
+        self.invalidate()
+        return func
+
+    def slot(self, name: Optional[str] = None) -> Callable[[Slot], Slot]:
+        """Decorator to add a dynamic slot
+
+        The function gets the :class:`Editor` of the new image and the value passed for the slot.
+        Slots are drawn in the order they are added, slots without a value are skipped.
+
+        Parameters
+        ----------
+        name: :class:`str`, optional
+            Name of the slot, by default the name of the function
+        """
+        def decorator(func: Slot) -> Slot:
+            self._slots[name or func.__name__] = func
+            return func
+
+        return decorator
+
+    def invalidate(self) -> None:
+        """Discard the prepared base image, it gets prepared again on the next use"""
+        self._prepared = None
+        self._preparing = None
+
+    async def prepare(self) -> Editor:
+        """Draw the static layers onto the base image, only done once
+
+        Returns
+        -------
+        :class:`Editor`
+            Editor of the prepared base image, it must not be changed
+        """
+        if self._prepared is not None:
+            return self._prepared
+
+        loop = asyncio.get_running_loop()
+        if self._preparing is None or self._preparing.get_loop() is not loop:
+            self._preparing = loop.create_task(self._prepare())
+
+        # Concurrent calls wait for the same preparation
+        preparing = self._preparing
+        try:
+            editor = await asyncio.shield(preparing)
+        except BaseException:
+            # A failed preparation is retried by the next call, a cancelled caller leaves it running
+            if preparing.done() and self._preparing is preparing:
+                self._preparing = None
+            raise
+
+        if self._preparing is preparing:
+            self._prepared = editor
+        return editor
+
+    async def _prepare(self) -> Editor:
+        editor = Editor(self.base)
+
+        async with editor.batch():
+            for layer in self._layers:
+                await layer(editor)
+
+        return editor
+
+    async def fill(self, **values: Any) -> Editor:
+        """Create a new image from the template
+
+        The base image is not copied until a slot changes it, all slots run in a single executor call.
+
+        Parameters
+        ----------
+        **values
+            Value of each slot by its name
+
+        Returns
+        -------
+        :class:`Editor`
+            Editor of the new image
+
+        Raises
+        ------
+        TypeError
+            When a value is given for an unknown slot
+        """
+        editor = (await self.prepare()).fork()
+
+        async with editor.batch():
+            await self._fill(editor, values)
+
+        return editor
+
+    async def render(self, format: str = 'png', params: Optional[Dict[str, Any]] = None, **values: Any) -> BytesIO:
+        """Create a new image from the template and encode it
+
+        Same as :meth:`fill` followed by :meth:`Editor.render`, drawing the slots and encoding
+        run in a single executor call.
+
+        Parameters
+        ----------
+        format: :class:`str`, optional
+            Image format, by default ``'png'``
+        params: Dict[:class:`str`, Any], optional
+            Extra parameters passed to the image writer, by default ``None``
+        **values
+            Value of each slot by its name
+
+        Returns
+        -------
+        :class:`BytesIO`
+            Bytes of the new image
+        """
+        editor = (await self.prepare()).fork()
+
+        async with editor.batch():
+            await self._fill(editor, values)
+            return await editor.render(format, **(params or {}))
+
+    async def _fill(self, editor: Editor, values: Dict[str, Any]) -> None:
+        unknown = set(values) - set(self._slots)
+        if unknown:
+            raise TypeError(f'Unknown slots: {", ".join(sorted(unknown))}')
+
+        for name, slot in self._slots.items():
+            if name in values:
+                await slot(editor, values[name])
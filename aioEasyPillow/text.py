@@ -23,13 +23,148 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from typing import Tuple, Union
+import math
+from typing import Hashable, Optional, Tuple, Union
 
-from PIL import ImageFont
+import PIL
+from PIL import ImageDraw, ImageFont
 
+from .cache import LRUCache
 from .font import Font
 
 
+def _mask_size(entry) -> int:
+    mask, _ = entry
+    return mask.size[0] * mask.size[1]
+
+
+_text_cache: Optional[LRUCache] = LRUCache(maxsize=16 * 1024 * 1024, getsizeof=_mask_size)
+_length_cache = LRUCache(maxsize=4096)
+
+_PILLOW_VERSION = tuple(int(part) for part in PIL.__version__.split('.')[:2])
+# Pillow 9.4 renders the fractional part of the position into the mask, it is part of the key
+_SUBPIXEL_TEXT = _PILLOW_VERSION >= (9, 4)
+# Pillow 11.2 fills the inside of the stroke and skips the text if it has the color of the stroke
+_FILLED_STROKE = _PILLOW_VERSION >= (11, 2)
+
+
+def set_text_cache(maxsize: Optional[int] = 16 * 1024 * 1024) -> Optional[LRUCache]:
+    """Set the size of the text cache
+
+    :meth:`Editor.text` and :meth:`Editor.multicolor_text` cache the rasterized text by text, font, anchor
+    and stroke width, so drawing the same text again only pastes the cached mask in the requested color.
+    Since Pillow 9.4 text is drawn at subpixel positions, so the fractional part of the position is part of the key.
+    Texts with several lines are not cached.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`, optional
+        Maximum size of the cached masks in bytes, by default ``16 MiB``. Set this to ``None`` to disable the cache.
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The new cache
+    """
+    global _text_cache
+
+    _text_cache = LRUCache(maxsize=maxsize, getsizeof=_mask_size) if maxsize is not None else None
+    return _text_cache
+
+
+def get_text_cache() -> Optional[LRUCache]:
+    """Get the text cache
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The cache set with :func:`set_text_cache`, ``None`` if it is disabled
+    """
+    return _text_cache
+
+
+def _font_key(font: ImageFont.FreeTypeFont) -> Hashable:
+    # Unpickled fonts (e.g. in a process pool) are new objects, so fonts from files are keyed by their file
+    if isinstance(font, ImageFont.FreeTypeFont) and isinstance(font.path, str):
+        return font.path, font.size, font.index, font.encoding, font.layout_engine
+    return font
+
+
+def _text_length(font: ImageFont.FreeTypeFont, text: str) -> float:
+    key = (_font_key(font), text)
+    length = _length_cache.get(key)
+
+    if length is None:
+        length = font.getlength(text)
+        _length_cache.set(key, length)
+
+    return length
+
+
+def _draw_text(
+    draw: ImageDraw.ImageDraw,
+    xy: Tuple[float, float],
+    text: str,
+    fill,
+    font: ImageFont.FreeTypeFont,
+    anchor: Optional[str] = None,
+    stroke_width: int = 0,
+    stroke_fill=None,
+) -> None:
+    # Same as ImageDraw.text of the installed Pillow version, except that the masks are cached
+    cache = _text_cache
+    if (
+        cache is None
+        or not isinstance(font, ImageFont.FreeTypeFont)
+        or '\n' in text
+        or '\r' in text
+        # Pasting the mask needs Pillow internals, which are not guaranteed to stay
+        or not hasattr(draw, '_getink')
+        or not hasattr(draw.draw, 'draw_bitmap')
+    ):
+        draw.text(xy, text, fill, font=font, anchor=anchor, stroke_width=stroke_width, stroke_fill=stroke_fill)
+        return
+
+    def getink(color):
+        ink, color = draw._getink(color)
+        return color if ink is None else ink
+
+    font_key = _font_key(font)
+    if _SUBPIXEL_TEXT:
+        coord = (int(xy[0]), int(xy[1]))
+        start = (math.modf(xy[0])[0], math.modf(xy[1])[0])
+    else:
+        coord, start = xy, None
+
+    def draw_mask(ink, width):
+        key = (font_key, text, draw.fontmode, anchor, width, start)
+        entry = cache.get(key)
+
+        if entry is None:
+            kwargs = {}
+            if start is not None:
+                kwargs['start'] = start
+            if width and _FILLED_STROKE:
+                kwargs['stroke_filled'] = True
+
+            entry = font.getmask2(text, draw.fontmode, stroke_width=width, anchor=anchor, ink=ink, **kwargs)
+            cache.set(key, entry)
+
+        mask, offset = entry
+        draw.draw.draw_bitmap((coord[0] + offset[0], coord[1] + offset[1]), mask, ink)
+
+    ink = getink(fill)
+    if ink is None:
+        return
+
+    if stroke_width:
+        stroke_ink = getink(stroke_fill) if stroke_fill is not None else ink
+        draw_mask(stroke_ink, stroke_width)
+        if _FILLED_STROKE and ink == stroke_ink:
+            return
+    draw_mask(ink, 0)
+
+
 class Text:
     """Text class
 
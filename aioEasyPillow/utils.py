@@ -24,12 +24,132 @@ SOFTWARE.
 """
 
 import asyncio
+import contextlib
 import functools
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 import aiohttp
 from PIL import Image
 
+from .cache import DiskCache, LRUCache
+
+_executor: Optional[Executor] = None
+_owns_executor: bool = False
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_owns_session: bool = False
+_session_options: Dict[str, Any] = {
+    'limit': 100,
+    'limit_per_host': 0,
+    'keepalive_timeout': 15.0,
+    'timeout': 30.0,
+}
+
+_image_cache: Optional[LRUCache] = None
+_image_cache_compressed: bool = False
+# Also the age at which files of the disk cache get revalidated, even if the memory cache is disabled
+_image_ttl: Optional[float] = 3600.0
+_disk_cache: Optional[DiskCache] = None
+_image_limits: Dict[str, Any] = {
+    'max_bytes': 20 * 1024 * 1024,
+    'max_pixels': 8192 * 8192,
+    'content_types': ('image/', 'application/octet-stream'),
+}
+
+
+class _PendingLoad:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+_pending_loads: Dict[Hashable, _PendingLoad] = {}
+
+
+class _CachedImage(NamedTuple):
+    data: Union[Image.Image, bytes]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def set_executor(
+    executor: Optional[Executor] = None,
+    *,
+    max_workers: Optional[int] = None,
+    thread_name_prefix: str = 'aioEasyPillow',
+    process: bool = False,
+) -> Optional[Executor]:
+    """Set the executor used for all image operations
+
+    By default the event loop's default executor is used, which is shared with every other blocking call.
+    Either pass your own executor or let the library create one with the given options.
+    Executors created by the library are shut down when they get replaced.
+
+    Parameters
+    ----------
+    executor: :class:`concurrent.futures.Executor`, optional
+        Executor to use, by default ``None``
+    max_workers: :class:`int`, optional
+        Amount of workers of the created executor, by default ``None``
+    thread_name_prefix: :class:`str`, optional
+        Thread name prefix of the created thread pool, by default ``'aioEasyPillow'``
+    process: :class:`bool`, optional
+        Create a :class:`concurrent.futures.ProcessPoolExecutor` instead of a thread pool, by default ``False``.
+        All arguments of the operations have to be picklable in this case.
+        Operations with side effects like :meth:`Editor.save` and :meth:`Editor.show` still run in a thread
+        of this process, so they can write to file objects like :class:`BytesIO`.
+
+    Returns
+    -------
+    Optional[:class:`concurrent.futures.Executor`]
+        The executor that is used now
+    """
+    global _executor, _owns_executor
+
+    if executor is None:
+        if process:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        owns_executor = True
+    else:
+        owns_executor = False
+
+    shutdown_executor(wait=False)
+    _executor, _owns_executor = executor, owns_executor
+    return _executor
+
+
+def get_executor() -> Optional[Executor]:
+    """Get the executor used for image operations
+
+    Returns
+    -------
+    Optional[:class:`concurrent.futures.Executor`]
+        The executor set with :func:`set_executor`, ``None`` if the loop's default executor is used
+    """
+    return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop using the executor set with :func:`set_executor` and fall back to the loop's default executor
+
+    Parameters
+    ----------
+    wait: :class:`bool`, optional
+        Wait for pending operations if the executor was created by the library, by default ``True``
+    """
+    global _executor, _owns_executor
+
+    if _executor is not None and _owns_executor:
+        _executor.shutdown(wait=wait)
+
+    _executor, _owns_executor = None, False
+
 
 async def run_in_executor(func, *args, **kwargs):
     """Run function in executor
@@ -40,27 +160,472 @@ async def run_in_executor(func, *args, **kwargs):
         Function to run
     """
     func = functools.partial(func, *args, **kwargs)
-    data = await asyncio.get_event_loop().run_in_executor(None, func)
+    data = await asyncio.get_event_loop().run_in_executor(_executor, func)
     return data
 
 
-async def load_image(link: str) -> Image.Image:
+async def set_session(
+    session: Optional[aiohttp.ClientSession] = None,
+    *,
+    limit: int = 100,
+    limit_per_host: int = 0,
+    keepalive_timeout: float = 15.0,
+    timeout: Optional[float] = 30.0,
+) -> None:
+    """Set the session used by :func:`load_image`
+
+    By default the library creates one pooled session with the given options on first use and keeps the
+    connections alive between requests. Sessions created by the library are closed when they get replaced.
+
+    Parameters
+    ----------
+    session: :class:`aiohttp.ClientSession`, optional
+        Session to use, by default ``None``. It is never replaced, so it has to stay open
+        and can only be used on the current event loop.
+    limit: :class:`int`, optional
+        Total number of simultaneous connections of the created session, by default ``100``
+    limit_per_host: :class:`int`, optional
+        Number of simultaneous connections to the same host, by default ``0`` (no limit)
+    keepalive_timeout: :class:`float`, optional
+        Seconds to keep idle connections open, by default ``15.0``
+    timeout: :class:`float`, optional
+        Total timeout of a request in seconds, by default ``30.0``
+    """
+    global _session, _session_loop, _owns_session
+
+    await close_session()
+
+    _session_options.update(
+        limit=limit, limit_per_host=limit_per_host, keepalive_timeout=keepalive_timeout, timeout=timeout
+    )
+    if session is not None:
+        _session, _session_loop, _owns_session = session, asyncio.get_running_loop(), False
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the session used by :func:`load_image`, create it if needed
+
+    A session of the library that is closed or belongs to another event loop is closed and replaced.
+
+    Returns
+    -------
+    :class:`aiohttp.ClientSession`
+        The pooled session
+
+    Raises
+    ------
+    RuntimeError
+        When the session passed to :func:`set_session` is closed or belongs to another event loop
+    """
+    global _session, _session_loop, _owns_session
+
+    loop = asyncio.get_running_loop()
+
+    # A session can't be reused after its event loop was closed (e.g. after asyncio.run)
+    if _session is not None and (_session.closed or _session_loop is not loop):
+        if not _owns_session:
+            raise RuntimeError(
+                'The session passed to set_session is closed or belongs to another event loop, '
+                'pass a new session to set_session or call set_session() to use a session of the library'
+            )
+
+        await _discard_session(_session, _session_loop)
+        _session = None
+
+    if _session is None:
+        connector = aiohttp.TCPConnector(
+            limit=_session_options['limit'],
+            limit_per_host=_session_options['limit_per_host'],
+            keepalive_timeout=_session_options['keepalive_timeout'],
+        )
+        timeout = aiohttp.ClientTimeout(total=_session_options['timeout'])
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        _session_loop, _owns_session = loop, True
+
+    return _session
+
+
+async def close_session() -> None:
+    """Close the session created by the library
+
+    A session passed to :func:`set_session` is not closed, only dropped.
+    A session of another event loop is closed on that loop.
+    """
+    global _session, _session_loop, _owns_session
+
+    if _session is not None and _owns_session:
+        await _discard_session(_session, _session_loop)
+
+    _session, _session_loop, _owns_session = None, None, False
+
+
+async def _discard_session(session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop) -> None:
+    if session.closed:
+        return
+
+    if loop is asyncio.get_running_loop() or loop.is_closed():
+        # The connections of a closed loop are dropped, closing only releases the session and its connector
+        with contextlib.suppress(RuntimeError):
+            await session.close()
+    else:
+        # Closed on its own loop, whenever that loop runs again
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+
+def set_image_cache(
+    maxsize: Optional[int] = 64 * 1024 * 1024,
+    *,
+    ttl: Optional[float] = 3600.0,
+    compressed: bool = False,
+) -> Optional[LRUCache]:
+    """Cache the images loaded by :func:`load_image`
+
+    The cache is keyed by url and evicts the least recently used images once ``maxsize`` is reached.
+    Expired images are revalidated with the ``ETag`` and ``Last-Modified`` headers of the response (if any),
+    so an unchanged image is not downloaded again.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`, optional
+        Maximum size of the cache in bytes, by default ``64 MiB``. Set this to ``None`` to disable the cache.
+    ttl: :class:`float`, optional
+        Seconds until a cached image gets revalidated, by default ``3600.0``. ``None`` never expires.
+        This applies to the files of :func:`set_disk_cache` as well, even if ``maxsize`` is ``None``.
+    compressed: :class:`bool`, optional
+        Store the downloaded bytes instead of the decoded images, by default ``False``.
+        This needs less memory but cache hits have to be decoded again.
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The new cache, use :meth:`LRUCache.info` for the hit and miss counters
+    """
+    global _image_cache, _image_cache_compressed, _image_ttl
+
+    _image_ttl = ttl
+    if maxsize is None:
+        _image_cache = None
+    else:
+        _image_cache = LRUCache(maxsize=maxsize, ttl=ttl, getsizeof=_cached_image_size)
+    _image_cache_compressed = compressed
+
+    return _image_cache
+
+
+def get_image_cache() -> Optional[LRUCache]:
+    """Get the cache used by :func:`load_image`
+
+    Returns
+    -------
+    Optional[:class:`LRUCache`]
+        The cache set with :func:`set_image_cache`, ``None`` if caching is disabled
+    """
+    return _image_cache
+
+
+def _cached_image_size(cached: _CachedImage) -> int:
+    if isinstance(cached.data, bytes):
+        return len(cached.data)
+
+    width, height = cached.data.size
+    return width * height * len(cached.data.getbands())
+
+
+async def _run_in_thread(func, *args, **kwargs):
+    # For work that can't be sent to a process pool, e.g. file access
+    executor = _executor if isinstance(_executor, ThreadPoolExecutor) else None
+    func = functools.partial(func, *args, **kwargs)
+    return await asyncio.get_event_loop().run_in_executor(executor, func)
+
+
+def set_disk_cache(directory: Optional[str], max_size: int = 512 * 1024 * 1024) -> Optional[DiskCache]:
+    """Store the images downloaded by :func:`load_image` in a directory
+
+    Cached images survive restarts, so they don't have to be downloaded again after a deploy.
+    The disk cache is used after the memory cache set with :func:`set_image_cache`.
+    Files older than the ``ttl`` of :func:`set_image_cache` are revalidated with the ``ETag`` and ``Last-Modified``
+    headers stored next to them, like expired images of the memory cache.
+
+    Parameters
+    ----------
+    directory: :class:`str`
+        Directory of the cache. Set this to ``None`` to disable the disk cache.
+    max_size: :class:`int`, optional
+        Maximum size of the directory in bytes, by default ``512 MiB``
+
+    Returns
+    -------
+    Optional[:class:`DiskCache`]
+        The new disk cache
+    """
+    global _disk_cache
+
+    _disk_cache = DiskCache(directory, max_size) if directory is not None else None
+    return _disk_cache
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Get the disk cache used by :func:`load_image`
+
+    Returns
+    -------
+    Optional[:class:`DiskCache`]
+        The cache set with :func:`set_disk_cache`, ``None`` if it is disabled
+    """
+    return _disk_cache
+
+
+def set_image_limits(
+    max_bytes: Optional[int] = 20 * 1024 * 1024,
+    max_pixels: Optional[int] = 8192 * 8192,
+    content_types: Optional[Tuple[str, ...]] = ('image/', 'application/octet-stream'),
+) -> None:
+    """Set the limits for images loaded by :func:`load_image`
+
+    Responses are rejected while they are streamed, images are rejected after reading their header,
+    so a huge image never gets fully downloaded or decoded.
+
+    Parameters
+    ----------
+    max_bytes: :class:`int`, optional
+        Maximum size of the response in bytes, by default ``20 MiB``. ``None`` disables the limit.
+    max_pixels: :class:`int`, optional
+        Maximum width times height of the image, by default ``8192 * 8192``. ``None`` disables the limit.
+    content_types: Tuple[:class:`str`, ...], optional
+        Allowed prefixes of the ``Content-Type`` header, by default ``('image/', 'application/octet-stream')``.
+        ``None`` allows all content types.
+    """
+    _image_limits.update(max_bytes=max_bytes, max_pixels=max_pixels, content_types=content_types)
+
+
+def _open_image(
+    fp, target_size: Optional[Tuple[int, int]] = None, max_pixels: Optional[int] = None
+) -> Image.Image:
+    # Opening only reads the header, the size can be checked before the image is decoded
+    image = Image.open(fp)
+
+    if max_pixels is not None and image.width * image.height > max_pixels:
+        raise ValueError(f'Image size {image.width}x{image.height} exceeds the limit of {max_pixels} pixels')
+
+    if target_size is not None:
+        # Let the decoder scale down (JPEG only), then reduce by the biggest factor that keeps the target size
+        image.draft(None, target_size)
+        factor = min(image.width // target_size[0], image.height // target_size[1])
+
+        if factor >= 2:
+            if image.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            image = image.reduce(factor)
+
+    if image.mode == 'RGBA':
+        image.load()
+        return image
+
+    return image.convert('RGBA')
+
+
+def _decode_image(
+    data: bytes, target_size: Optional[Tuple[int, int]] = None, max_pixels: Optional[int] = None
+) -> Image.Image:
+    return _open_image(BytesIO(data), target_size, max_pixels)
+
+
+def _load_cached_file(
+    cache: DiskCache, link: str, target_size: Optional[Tuple[int, int]] = None, max_pixels: Optional[int] = None
+) -> Optional[Tuple[Image.Image, Optional[bytes], Dict[str, Any]]]:
+    data = cache.open(link)
+    if data is None:
+        return None
+
+    # Files without metadata count as expired and are downloaded again
+    metadata = cache.metadata(link) or {}
+    with data:
+        image = _open_image(data, target_size, max_pixels)
+        return image, data[:] if _image_cache_compressed else None, metadata
+
+
+async def _cached_image(cached: _CachedImage, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    if isinstance(cached.data, bytes):
+        return await run_in_executor(_decode_image, cached.data, target_size, _image_limits['max_pixels'])
+
+    # The cached image must not be edited by the caller
+    return cached.data.copy()
+
+
+async def load_image(link: str, target_size: Optional[Tuple[int, int]] = None) -> Image.Image:
     """Load image from link
 
+    Uses the caches set with :func:`set_image_cache` and :func:`set_disk_cache` (if any).
+    Concurrent calls for the same link share one download and decode.
+    The image has to match the limits set with :func:`set_image_limits`.
+
     Parameters
     ----------
     link: :class:`str`
         Image url
+    target_size: Tuple[:class:`int`, :class:`int`], optional
+        Size the image gets resized to afterwards, by default ``None``.
+        Big images are decoded at a reduced size that is still at least ``target_size``,
+        which is a lot faster and needs less memory than decoding the full image.
 
     Returns
     -------
     :class:`PIL.Image.Image`
         Image from the provided link (if any)
+
+    Raises
+    ------
+    ValueError
+        When the response or the image exceeds the limits set with :func:`set_image_limits`
+    aiohttp.ClientResponseError
+        When the response has an error status
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(link) as response:
-            data = await response.read()
+    loop = asyncio.get_running_loop()
+    key = link if target_size is None else (link, tuple(target_size))
+    pending = _pending_loads.get(key)
+
+    if pending is None or pending.task.get_loop() is not loop:
+        pending = _PendingLoad(loop.create_task(_load_image(link, key, target_size)))
+        pending.task.add_done_callback(functools.partial(_finish_load, key, pending))
+        _pending_loads[key] = pending
+
+    pending.waiters += 1
+    try:
+        # One cancelled caller must not cancel the load of the others
+        image = await asyncio.shield(pending.task)
+    finally:
+        pending.waiters -= 1
+
+    # Every caller gets its own image, the last one takes the loaded one
+    return image if pending.waiters == 0 else image.copy()
+
+
+def _finish_load(key: Hashable, pending: _PendingLoad, _: asyncio.Task) -> None:
+    if _pending_loads.get(key) is pending:
+        del _pending_loads[key]
+
+
+async def _load_image(link: str, key: Hashable, target_size: Optional[Tuple[int, int]]) -> Image.Image:
+    cache = _image_cache
+    stale: Optional[_CachedImage] = None
+    # Image of a stale file of the disk cache, returned if the server didn't change it
+    stale_image: Optional[Image.Image] = None
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return await _cached_image(cached, target_size)
+
+        stale = cache.peek(key)
+
+    if stale is None and _disk_cache is not None:
+        loaded = await _run_in_thread(
+            _load_cached_file, _disk_cache, link, target_size, _image_limits['max_pixels']
+        )
+        if loaded is not None:
+            image, data, metadata = loaded
+            cached = _CachedImage(
+                data if _image_cache_compressed else image, metadata.get('etag'), metadata.get('last_modified')
+            )
+
+            # Files keep the time they were downloaded, so they expire like the memory cache across restarts
+            age = time.time() - metadata.get('fetched', 0)
+            if _image_ttl is None or age < _image_ttl:
+                if cache is not None:
+                    expires_in = _image_ttl - age if _image_ttl is not None else None
+                    cache.set(key, _own_copy(cached), expires_in)
+                return image
+
+            stale, stale_image = cached, image
+
+    headers = {}
+    if stale is not None:
+        if stale.etag:
+            headers['If-None-Match'] = stale.etag
+        if stale.last_modified:
+            headers['If-Modified-Since'] = stale.last_modified
+
+    session = await get_session()
+    async with session.get(link, headers=headers) as response:
+        if response.status == 304 and stale is not None:
+            if stale_image is not None:
+                await _run_in_thread(_disk_cache.set_metadata, link, _file_metadata(stale.etag, stale.last_modified))
+            if cache is not None:
+                cache.set(key, stale if stale_image is None else _own_copy(stale))
+            return stale_image if stale_image is not None else await _cached_image(stale, target_size)
+
+        data = await _read_response(response)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+
+    image = await run_in_executor(_decode_image, data, target_size, _image_limits['max_pixels'])
+
+    if _disk_cache is not None:
+        await _run_in_thread(_disk_cache.set, link, data, _file_metadata(etag, last_modified))
+
+    if cache is not None:
+        cached_data = data if _image_cache_compressed else image.copy()
+        cache.set(key, _CachedImage(cached_data, etag, last_modified))
 
-    _bytes = BytesIO(data)
-    image = Image.open(_bytes).convert("RGBA")
     return image
+
+
+def _own_copy(cached: _CachedImage) -> _CachedImage:
+    # The image of a file is returned to the caller, the memory cache needs its own copy
+    return cached if isinstance(cached.data, bytes) else cached._replace(data=cached.data.copy())
+
+
+def _file_metadata(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, Any]:
+    return {'etag': etag, 'last_modified': last_modified, 'fetched': time.time()}
+
+
+async def _read_response(response: aiohttp.ClientResponse) -> bytes:
+    response.raise_for_status()
+
+    content_types = _image_limits['content_types']
+    if content_types is not None and not response.content_type.startswith(content_types):
+        raise ValueError(f'Unexpected content type {response.content_type!r} of {response.url}')
+
+    max_bytes = _image_limits['max_bytes']
+    if max_bytes is None:
+        return await response.read()
+
+    if response.content_length is not None and response.content_length > max_bytes:
+        raise ValueError(f'Response of {response.url} exceeds the limit of {max_bytes} bytes')
+
+    # The content length can be missing or wrong, so the limit is checked while streaming as well
+    data = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        data += chunk
+        if len(data) > max_bytes:
+            raise ValueError(f'Response of {response.url} exceeds the limit of {max_bytes} bytes')
+
+    return bytes(data)
+
+
+async def load_images(
+    links: Iterable[str], concurrency: int = 10, target_size: Optional[Tuple[int, int]] = None
+) -> List[Image.Image]:
+    """Load multiple images from links
+
+    Parameters
+    ----------
+    links: Iterable[:class:`str`]
+        Image urls
+    concurrency: :class:`int`, optional
+        Maximum amount of images loaded at the same time, by default ``10``
+    target_size: Tuple[:class:`int`, :class:`int`], optional
+        Size the images get resized to afterwards, by default ``None``. See :func:`load_image`.
+
+    Returns
+    -------
+    List[:class:`PIL.Image.Image`]
+        Images in the same order as the provided links
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _load(link: str) -> Image.Image:
+        async with semaphore:
+            return await load_image(link, target_size)
+
+    return list(await asyncio.gather(*(_load(link) for link in links)))